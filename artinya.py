@@ -1,56 +1,360 @@
 import csv
-from engine import Describe, TranslateEval
+import time
+import asyncio
+import engine
+from concurrent.futures import ThreadPoolExecutor
+from cache import ResponseCache
+from ratelimit import RateLimiter
+from metrics import RunMetrics
+from engine import Describe, TranslateEval, AsyncDescribe, AsyncTranslateEval
+from batch import BatchRunner, BatchDescribe, BatchTranslateEval
+from journal import Journal
+from dedup import dedupe, expand, near_duplicate_representatives
+from chunking import split_document, join_chunks, document_head
+from policy import DecisionLog, AdaptiveEvalPolicy
 
 class Artinya:
-    def __init__(self, src_lang, dest_lang, max_retries=5, descriptions=True, eval=True):
+    def __init__(self, src_lang, dest_lang, max_retries=5, descriptions=True, eval=True, max_concurrency=16, cache=None, pack_size=1, pack_token_budget=2000, rpm=None, tpm=None, dedup=False, near_dedup=False, near_dedup_threshold=0.8, structured=False, self_eval=False, candidates=1, repair=False, models=None, escalate_after=1, eval_policy=None, audit_log=None):
         self.src_lang = src_lang
+        # dest_lang can be a list: each text is then described once and translated into every target,
+        # and the translate results are keyed by language
+        self.dest_langs = list(dest_lang) if isinstance(dest_lang, (list, tuple)) else None
         self.dest_lang = dest_lang
         self.max_retries = max_retries
         self.descriptions = descriptions
         self.eval = eval
+        self.max_concurrency = max_concurrency # max requests in flight for apipe
+        self.pack_size = pack_size # inputs per describe/translate request in pipe, 1 disables packing
+        self.pack_token_budget = pack_token_budget
+        self.dedup = dedup # send each normalized text through pipe once, fan results back out
+        self.near_dedup = near_dedup # near-duplicates (MinHash) reuse their cluster's description
+        self.near_dedup_threshold = near_dedup_threshold
+        self.structured = structured # JSON schema outputs for description and evaluation
+        self.self_eval = self_eval # translation + evaluation in one structured response
+        self.candidates = candidates # translations sampled per attempt, evaluated together
+        self.repair = repair # retries get the failed criteria of the rejected translation
+        self.metrics = None # RunMetrics of the last pipe/apipe/stream/batch_pipe run
+        # models: stage -> model, e.g. {"describe": "gpt-4o-mini", "translate": ["gpt-4o-mini", "gpt-4o"],
+        # "evaluate": "gpt-4o"}. A list for "translate" is a cascade, cheapest first, escalating one step
+        # every `escalate_after` failed evaluations. Missing stages use engine.MODEL.
+        self.models = models or {}
+        self.escalate_after = escalate_after
+        # eval_policy: an AdaptiveEvalPolicy (True for the default one) that skips evaluation where it
+        # rarely catches anything, None/False evaluates everything. Its decisions and every escalation are
+        # counted in self.decision_log, and appended to the `audit_log` JSONL file when one is given.
+        if eval_policy is True:
+            eval_policy = AdaptiveEvalPolicy()
+        self.eval_policy = eval_policy or None
+        self.decision_log = DecisionLog(audit_log)
+        
+        # cache: a path to the sqlite file or a ResponseCache, shared by every llm() call in the process
+        if isinstance(cache, str):
+            cache = ResponseCache(cache)
+        if cache is not None:
+            engine.set_cache(cache)
+        
+        # account limits, shared by every stage in the process (see ratelimit.py)
+        if rpm is not None or tpm is not None:
+            engine.set_rate_limiter(RateLimiter(rpm=rpm, tpm=tpm))
     
-    def pipe(self, prompts: list[str], verbose=True):
+    def pipe(self, prompts: list[str], verbose=True, resume=None):
+        # resume: path to a journal file. Every finished item is appended to it as soon as it is done,
+        # and items already finished in it are skipped, so a crashed run only redoes the unfinished tail.
+        if resume is not None and self.dest_langs is not None:
+            raise ValueError("resume= works with a single dest_lang")
+        journal = Journal(resume, self.src_lang, self.dest_lang) if resume is not None else None
+        self.metrics = RunMetrics()
+        
+        positions = None
+        if self.dedup:
+            n_prompts = len(prompts)
+            prompts, positions = dedupe(prompts)
+            print(f"Deduplicated {n_prompts} inputs to {len(prompts)} unique texts")
+        
         if self.descriptions:
+            describe_prompts, members = prompts, None
+            if self.near_dedup:
+                representatives = near_duplicate_representatives(prompts, threshold=self.near_dedup_threshold)
+                cluster_ids = sorted(set(representatives))
+                slot = {representative: n for n, representative in enumerate(cluster_ids)}
+                describe_prompts = [prompts[idx] for idx in cluster_ids]
+                members = [slot[representative] for representative in representatives]
+                print(f"Describing {len(describe_prompts)} near-duplicate clusters for {len(prompts)} texts")
+            
             print("Describing...")
-            describer = Describe(src_lang = self.src_lang, max_retries = self.max_retries)
-            desc_results = describer.describe(prompts)
+            describer = Describe(src_lang = self.src_lang, max_retries = self.max_retries, structured = self.structured, pack_size = self.pack_size, pack_token_budget = self.pack_token_budget, metrics = self.metrics, model = self.models.get("describe"))
+            if journal is not None:
+                journal.restore_tokens("describe", describer)
+                desc_results = describer.describe(
+                    describe_prompts,
+                    done=journal.completed("describe", describe_prompts),
+                    on_result=lambda idx, description: journal.record_description(idx, describe_prompts[idx], description, describer.counters())
+                )
+            else:
+                desc_results = describer.describe(describe_prompts)
+            
+            if members is not None:
+                desc_results = expand(desc_results, members)
         else:
             desc_results = None
         
         print("Translating...")
-        translator = TranslateEval(src_lang = self.src_lang, dest_lang = self.dest_lang, max_retries = self.max_retries, descriptions=desc_results)
-        translate_results = translator.translate(prompts)
+        if self.dest_langs is not None:
+            translate_results = self._translate_targets(prompts, desc_results)
+        else:
+            translator = self._pipe_translator(self.dest_lang, desc_results)
+            if journal is not None:
+                journal.restore_tokens("translate", translator)
+                translate_results = translator.translate(
+                    prompts,
+                    done=journal.completed("translate", prompts),
+                    on_result=lambda idx, translation, evaluated: journal.record_translation(
+                        idx, prompts[idx], translation, self._evaluation_outcome(translation, evaluated), translator.counters()
+                    )
+                )
+                journal.close()
+            else:
+                translate_results = translator.translate(prompts)
+        
+        if positions is not None:
+            desc_results = expand(desc_results, positions) if desc_results is not None else None
+            if self.dest_langs is not None:
+                translate_results = {dest_lang: expand(results, positions) for dest_lang, results in translate_results.items()}
+            else:
+                translate_results = expand(translate_results, positions)
+        
+        if verbose:
+            self._print_summary()
+            
+        return desc_results, translate_results
+
+    def _pipe_translator(self, dest_lang, desc_results, stage_label=None):
+        return TranslateEval(src_lang = self.src_lang, dest_lang = dest_lang, max_retries = self.max_retries, descriptions=desc_results, eval=self.eval, structured = self.structured, self_eval = self.self_eval, candidates = self.candidates, repair = self.repair, pack_size = self.pack_size, pack_token_budget = self.pack_token_budget, metrics = self.metrics, stage_label = stage_label, **self._cascade_options())
+
+    def _translate_targets(self, prompts, desc_results):
+        # One TranslateEval per target language, all sharing the descriptions and running side by side on
+        # threads (the client, cache, rate limiter and metrics are thread-safe). The prompt prefixes don't
+        # depend on the language, but they are below the 1024-token caching threshold, so nothing is cached yet.
+        def translate(dest_lang):
+            return self._pipe_translator(dest_lang, desc_results, stage_label=dest_lang).translate(prompts)
+        
+        with ThreadPoolExecutor(max_workers=len(self.dest_langs)) as executor:
+            return dict(zip(self.dest_langs, executor.map(translate, self.dest_langs)))
+
+    def _cascade_options(self):
+        # per-stage models, cascade and evaluation policy options shared by every translator
+        return {
+            "model": self.models.get("translate"),
+            "eval_model": self.models.get("evaluate"),
+            "escalate_after": self.escalate_after,
+            "eval_policy": self.eval_policy,
+            "decision_log": self.decision_log
+        }
+
+    def _require_single_dest_lang(self, method):
+        if self.dest_langs is not None:
+            raise ValueError(f"{method}() translates into a single dest_lang, use pipe/apipe/batch_pipe for several")
+
+    def _evaluation_outcome(self, translation, evaluated):
+        # TranslateEval only returns an evaluated translation once it passed. Translations the evaluation
+        # policy skipped are "Not Evaluated", so the audit trail never claims a check that didn't happen.
+        if not self.eval:
+            return None
+        if translation is None:
+            return "Translation Failed"
+        return "Translation Passed" if evaluated else "Not Evaluated"
+
+    async def apipe(self, prompts: list[str], verbose=True):
+        # Same phases and return shape as pipe(), with up to `max_concurrency` requests in flight per phase.
+        # Results come back in input order.
+        self.metrics = RunMetrics()
+        if self.descriptions:
+            print("Describing...")
+            describer = AsyncDescribe(src_lang = self.src_lang, max_retries = self.max_retries, structured = self.structured, max_concurrency = self.max_concurrency, metrics = self.metrics, model = self.models.get("describe"))
+            desc_results = await describer.adescribe(prompts)
+        else:
+            desc_results = None
+        
+        print("Translating...")
+        if self.dest_langs is not None:
+            # all targets at once; max_concurrency is split between them so the total in flight stays the same
+            max_concurrency = max(1, self.max_concurrency // len(self.dest_langs))
+            results = await asyncio.gather(*(
+                AsyncTranslateEval(src_lang = self.src_lang, dest_lang = dest_lang, max_retries = self.max_retries, descriptions=desc_results, eval=self.eval, structured = self.structured, self_eval = self.self_eval, candidates = self.candidates, repair = self.repair, max_concurrency = max_concurrency, metrics = self.metrics, stage_label = dest_lang, **self._cascade_options()).atranslate(prompts)
+                for dest_lang in self.dest_langs
+            ))
+            translate_results = dict(zip(self.dest_langs, results))
+        else:
+            translator = AsyncTranslateEval(src_lang = self.src_lang, dest_lang = self.dest_lang, max_retries = self.max_retries, descriptions=desc_results, eval=self.eval, structured = self.structured, self_eval = self.self_eval, candidates = self.candidates, repair = self.repair, max_concurrency = self.max_concurrency, metrics = self.metrics, **self._cascade_options())
+            translate_results = await translator.atranslate(prompts)
+        
+        if verbose:
+            self._print_summary()
+            
+        return desc_results, translate_results
+
+    def _row_stages(self, describe_cls, translate_cls, metrics):
+        # Stage objects for one streamed row, recording into the row's own RunMetrics
+        describer = describe_cls(src_lang = self.src_lang, max_retries = self.max_retries, structured = self.structured, metrics = metrics, model = self.models.get("describe")) if self.descriptions else None
+        translator = translate_cls(src_lang = self.src_lang, dest_lang = self.dest_lang, max_retries = self.max_retries, eval=self.eval, structured = self.structured, self_eval = self.self_eval, candidates = self.candidates, repair = self.repair, metrics = metrics, **self._cascade_options())
+        return describer, translator
+
+    def _row_result(self, idx, prompt, description, translation, evaluated, metrics, started):
+        return {
+            "index": idx,
+            "text": prompt,
+            "description": description,
+            "translation": translation,
+            "evaluation": self._evaluation_outcome(translation, evaluated),
+            "tokens": metrics.total("total_tokens"),
+            "latency": time.perf_counter() - started
+        }
+
+    def stream(self, prompts, sink=None, verbose=True):
+        # Generator version of pipe(): each item goes describe -> translate -> evaluate and is yielded
+        # as soon as it is done. `prompts` can be any iterable, it is consumed lazily.
+        # Every result carries its evaluation verdict and its own token count and latency.
+        self._require_single_dest_lang("stream")
+        self.metrics = RunMetrics()
+        
+        count = 0
+        for idx, prompt in enumerate(prompts):
+            started = time.perf_counter()
+            row_metrics = RunMetrics(parent=self.metrics)
+            describer, translator = self._row_stages(Describe, TranslateEval, row_metrics)
+            description = describer._get_structured_response(prompt) if describer is not None else None
+            translation, evaluated = translator._translate_item(prompt, description)
+            
+            result = self._row_result(idx, prompt, description, translation, evaluated, row_metrics, started)
+            if sink is not None:
+                sink.write(result)
+            count += 1
+            yield result
+        
+        if verbose and count:
+            self._print_summary()
+
+    async def astream(self, prompts, sink=None, verbose=True):
+        # Async iterator version of stream(): up to `max_concurrency` items in flight, each result is
+        # yielded as soon as its item completes, so the order follows completion (see result["index"]).
+        # `prompts` is pulled lazily, only as slots free up.
+        self._require_single_dest_lang("astream")
+        self.metrics = RunMetrics()
+        
+        async def process(idx, prompt):
+            started = time.perf_counter()
+            row_metrics = RunMetrics(parent=self.metrics)
+            describer, translator = self._row_stages(AsyncDescribe, AsyncTranslateEval, row_metrics)
+            description = await describer._aget_structured_response(prompt) if describer is not None else None
+            translation, evaluated = await translator._atranslate_item(prompt, description)
+            return self._row_result(idx, prompt, description, translation, evaluated, row_metrics, started)
+        
+        count = 0
+        in_flight = set()
+        prompts = enumerate(prompts)
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < self.max_concurrency:
+                item = next(prompts, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    in_flight.add(asyncio.ensure_future(process(*item)))
+            
+            if not in_flight:
+                break
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if sink is not None:
+                    sink.write(result)
+                count += 1
+                yield result
+        
+        if verbose and count:
+            self._print_summary()
+
+    async def atranslate_document(self, text, chunk_token_budget=800, context_chars=200, describe_token_budget=2000, previous=None, verbose=True):
+        # Document mode for long inputs: the document is described once (from its leading chunks, up to
+        # describe_token_budget), split at sentence/paragraph boundaries into chunks of chunk_token_budget
+        # estimated tokens, and the chunks are translated and evaluated concurrently with the shared
+        # description and some neighbouring text. Chunks that fail are retried on their own.
+        # previous: an earlier result for the same text; its description and passed chunks are reused,
+        # so only its failed_chunks are sent again.
+        self._require_single_dest_lang("translate_document")
+        self.metrics = RunMetrics()
+        chunks, separators = split_document(text, chunk_token_budget)
+        if previous is not None and previous["source_chunks"] != chunks:
+            previous = None # different text or budget, nothing to reuse
+        
+        description = previous["description"] if previous is not None else None
+        if self.descriptions and description is None:
+            print("Describing document...")
+            describer = AsyncDescribe(src_lang = self.src_lang, max_retries = self.max_retries, structured = self.structured, metrics = self.metrics, model = self.models.get("describe"))
+            description = await describer._aget_structured_response(document_head(chunks, describe_token_budget))
+        
+        print(f"Translating {len(chunks)} chunks...")
+        translator = AsyncTranslateEval(src_lang = self.src_lang, dest_lang = self.dest_lang, max_retries = self.max_retries, eval=self.eval, structured = self.structured, self_eval = self.self_eval, candidates = self.candidates, repair = self.repair, max_concurrency = self.max_concurrency, metrics = self.metrics, **self._cascade_options())
+        done = dict(enumerate(previous["chunks"])) if previous is not None else None
+        translate_results = await translator.atranslate_chunks(chunks, description, context_chars, done)
+        
+        translations = translate_results["results"]
+        failed_chunks = [idx for idx, translation in enumerate(translations) if translation is None]
+        if failed_chunks:
+            print(f"{len(failed_chunks)}/{len(chunks)} chunks failed, pass this result as previous= to retry only those")
+        
+        if verbose:
+            self._print_summary()
+        
+        return {
+            "translation": join_chunks(translations, separators) if not failed_chunks else None,
+            "description": description,
+            "chunks": translations,
+            "source_chunks": chunks,
+            "failed_chunks": failed_chunks
+        }
+
+    def translate_document(self, text, **kwargs):
+        # Blocking version of atranslate_document()
+        return asyncio.run(self.atranslate_document(text, **kwargs))
+
+    def batch_pipe(self, prompts: list[str], verbose=True, runner=None):
+        # Same phases and return shape as pipe(), but every phase is submitted through the OpenAI Batch API.
+        # Meant for offline jobs: cheaper and outside the normal rate limits, but each batch can take hours.
+        runner = runner or BatchRunner()
+        self.metrics = RunMetrics()
+        
+        if self.descriptions:
+            print("Describing (batch)...")
+            describer = BatchDescribe(src_lang = self.src_lang, max_retries = self.max_retries, structured = self.structured, runner = runner, metrics = self.metrics, model = self.models.get("describe"))
+            desc_results = describer.batch_describe(prompts)
+        else:
+            desc_results = None
+        
+        print("Translating (batch)...")
+        if self.dest_langs is not None:
+            # one batch job per target language, submitted and waited on side by side
+            def translate(dest_lang):
+                return BatchTranslateEval(src_lang = self.src_lang, dest_lang = dest_lang, max_retries = self.max_retries, descriptions=desc_results, eval=self.eval, structured = self.structured, self_eval = self.self_eval, candidates = self.candidates, repair = self.repair, runner = runner, metrics = self.metrics, stage_label = dest_lang, **self._cascade_options()).batch_translate(prompts)
+            
+            with ThreadPoolExecutor(max_workers=len(self.dest_langs)) as executor:
+                translate_results = dict(zip(self.dest_langs, executor.map(translate, self.dest_langs)))
+        else:
+            translator = BatchTranslateEval(src_lang = self.src_lang, dest_lang = self.dest_lang, max_retries = self.max_retries, descriptions=desc_results, eval=self.eval, structured = self.structured, self_eval = self.self_eval, candidates = self.candidates, repair = self.repair, runner = runner, metrics = self.metrics, **self._cascade_options())
+            translate_results = translator.batch_translate(prompts)
         
         if verbose:
-            from tabulate import tabulate
-            table_data = [
-                ["Description Completion Tokens", desc_results['completion_tokens']],
-                ["Description Prompt Tokens", desc_results['prompt_tokens']],
-                ["Description Cached Tokens", desc_results['cached_tokens']],
-                ["Description Total Tokens", desc_results['total_tokens']],
-                ["Description Total Retry Attempts", desc_results['total_retry_attempts']],
-                ["Average Description Retry Attempts", desc_results['average_retry_attempts']],
-                ["-"*30, "-"*8], 
-
-                ["Translation Completion Tokens", translate_results['translation_completion_tokens']],
-                ["Translation Prompt Tokens", translate_results['translation_prompt_tokens']],
-                ["Translation Cached Tokens", translate_results['translation_cached_tokens']],
-                ["Translation Total Tokens", translate_results['translation_total_tokens']],
-                ["Translation Total Retry Attempts", translate_results['translation_total_retry_attempts']],
-                ["Average Translation Retry Attempts", translate_results['average_translation_retry_attempts']],
-                ["-"*30, "-"*8], 
-
-                ["Evaluation Completion Tokens", translate_results['evaluation_completion_tokens']],
-                ["Evaluation Prompt Tokens", translate_results['evaluation_prompt_tokens']],
-                ["Evaluation Cached Tokens", translate_results['evaluation_cached_tokens']],
-                ["Evaluation Total Tokens", translate_results['evaluation_total_tokens']],
-                ["Evaluation Total Retry Attempts", translate_results['evaluation_total_retry_attempts']],
-                ["Average Evaluation Retry Attempts", translate_results['average_evaluation_retry_attempts']]
-            ]
-            print(tabulate(table_data, headers=["Metric", "Value"], tablefmt="grid"))
+            self._print_summary()
             
         return desc_results, translate_results
 
+    def _print_summary(self):
+        # Per-stage calls, tokens, retries and latency percentiles of the last run (see metrics.py).
+        # The same numbers are available as self.metrics.to_json() / self.metrics.to_prometheus().
+        print(self.metrics.report(model=engine.MODEL, show_cache=engine.get_cache() is not None))
+        if self.decision_log.counts:
+            print("Cascade and evaluation policy decisions: " + ", ".join(f"{decision}={count}" for decision, count in sorted(self.decision_log.counts.items())))
+
     def to_csv(self, prompts, translate_results, filename='results.csv'):
         # 2 columns -> original text, translated text
         # translate_result is like this -> {'results': ['Mona Lisa adalah lukisan potret karya Leonardo da Vinci, yang menggambarkan subjek dengan ekspresi yang penuh teka-teki.', 'Ada tiga manhwa 
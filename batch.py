@@ -0,0 +1,230 @@
+import json
+import time
+import engine
+from engine import Describe, TranslateEval
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_DONE_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+def _parse_body(body):
+    # Same shape as engine._parse_completion, but from the raw JSON body the Batch API returns.
+    usage = body["usage"]
+    return {
+        "response": body["choices"][0]["message"]["content"],
+        "responses": [choice["message"]["content"] for choice in body["choices"]],
+        "used_prompt_tokens": usage["prompt_tokens"],
+        "used_completion_tokens": usage["completion_tokens"],
+        "total_used_tokens": usage["total_tokens"],
+        "cached_prompt_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+        "cache_hit": False,
+        "model": body.get("model"),
+        "backoffs": 0
+    }
+
+class BatchRunner:
+    # Submits one phase worth of chat requests as a Batch API job and maps the answers back by custom_id.
+    # `client` defaults to the shared engine client, anything with the same files/batches interface works
+    # (e.g. an OpenAI client pointed at a local stand-in server).
+    def __init__(self, client=None, model=None, poll_interval=30, completion_window="24h"):
+        self.client = client
+        self.model = model or engine.MODEL
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    def _get_client(self):
+        return self.client if self.client is not None else engine.get_client()
+
+    def _request_line(self, custom_id, system_prompt, query_prompt, response_format=None, model=None):
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": model or self.model,
+                "messages": engine._messages(system_prompt, query_prompt),
+                **engine._request_params(response_format)
+            }
+        }
+
+    def _serialize(self, requests, response_format=None, model=None):
+        lines = [
+            json.dumps(self._request_line(custom_id, system_prompt, query_prompt, response_format, model), ensure_ascii=False)
+            for custom_id, (system_prompt, query_prompt) in requests.items()
+        ]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _wait(self, batch_id):
+        client = self._get_client()
+        while True:
+            batch = client.batches.retrieve(batch_id)
+            if batch.status in BATCH_DONE_STATUSES:
+                return batch
+            time.sleep(self.poll_interval)
+
+    def _read_output(self, file_id):
+        results = {}
+        if file_id is None:
+            return results
+
+        content = self._get_client().files.content(file_id).text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if item.get("error") is None and response.get("status_code") == 200:
+                results[item["custom_id"]] = _parse_body(response["body"])
+        return results
+
+    def run(self, requests: dict, response_format=None, model=None) -> dict:
+        # requests: custom_id -> (system_prompt, query_prompt), response_format and model apply to all of them
+        # (a batch job takes a single model), model defaults to the runner's
+        # returns: custom_id -> parsed response, or None when the request errored or the batch didn't finish it
+        if not requests:
+            return {}
+
+        client = self._get_client()
+        input_file = client.files.create(file=("batch.jsonl", self._serialize(requests, response_format, model)), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window
+        )
+        print(f"Submitted batch {batch.id} with {len(requests)} requests, waiting...")
+
+        batch = self._wait(batch.id)
+        if batch.status != "completed":
+            print(f"Batch {batch.id} ended with status {batch.status}")
+
+        results = self._read_output(batch.output_file_id)
+        return {custom_id: results.get(custom_id) for custom_id in requests}
+
+class BatchDescribe(Describe):
+    # Describe phase as Batch API jobs. Items without all required tokens go into a follow-up retry batch.
+    def __init__(self, max_retries=5, src_lang="English", runner=None, **kwargs):
+        super().__init__(max_retries=max_retries, src_lang=src_lang, **kwargs)
+        self.runner = runner or BatchRunner()
+
+    def batch_describe(self, prompts: list) -> dict:
+        results = [None] * len(prompts)
+        pending = list(range(len(prompts)))
+
+        for attempt in range(self.max_retries):
+            if not pending:
+                break
+
+            responses = self.runner.run({
+                f"describe-{idx}-{attempt}": (self.DESCRIBE_SYSTEM_PROMPT, self._query_prompt(prompts[idx]))
+                for idx in pending
+            }, response_format=self.response_format, model=self.model)
+
+            still_pending = []
+            for idx in pending:
+                response = responses[f"describe-{idx}-{attempt}"]
+                parsed_results = self._handle_response(response, attempt) if response is not None else None
+                if parsed_results is None:
+                    still_pending.append(idx)
+                else:
+                    results[idx] = parsed_results
+            pending = still_pending
+
+        return self._summary(results, len(prompts))
+
+class BatchTranslateEval(TranslateEval):
+    # Translate and evaluate phases as Batch API jobs. Evaluations with missing tokens are re-sent in
+    # an evaluation retry batch, failed translations are re-sent in the next translation batch.
+    def __init__(self, src_lang, dest_lang, descriptions=None, max_retries=5, eval=True, runner=None, **kwargs):
+        super().__init__(src_lang, dest_lang, descriptions=descriptions, max_retries=max_retries, eval=eval, **kwargs)
+        self.runner = runner or BatchRunner()
+
+    def _batch_evaluate(self, queries, translations):
+        # translations: idx -> translated text. Returns idx -> "Translation Passed"/"Translation Failed"/None
+        eval_results = {}
+        pending = list(translations)
+
+        for attempt in range(self.max_retries):
+            if not pending:
+                break
+
+            responses = self.runner.run({
+                f"evaluate-{idx}-{attempt}": (self.EVALUATE_SYSTEM_PROMPT, self._eval_query_prompt(queries[idx], translations[idx]))
+                for idx in pending
+            }, response_format=self.eval_response_format, model=self.eval_model)
+
+            still_pending = []
+            for idx in pending:
+                response = responses[f"evaluate-{idx}-{attempt}"]
+                eval_result = self._handle_eval_response(response, attempt) if response is not None else None
+                if eval_result is None:
+                    still_pending.append(idx)
+                else:
+                    eval_results[idx] = eval_result
+            pending = still_pending
+
+        return eval_results
+
+    def _batch_translations(self, queries, pending, checked, tiers, attempt):
+        # A batch job takes a single model, so every cascade tier goes out as its own job. Items the
+        # evaluation policy skipped get the plain translation prompt, so they are a job of their own too.
+        jobs = {}
+        for idx in pending:
+            jobs.setdefault((tiers[idx], idx in checked), []).append(idx)
+
+        responses = {}
+        for (tier, evaluate), group in sorted(jobs.items()):
+            responses.update(self.runner.run({
+                f"translate-{idx}-{attempt}": (
+                    self._translation_system_prompt() if evaluate else self.TRANSLATE_SYSTEM_PROMPT,
+                    self._query_prompt(self.src_lang, self.dest_lang, queries[idx], self._description_for(idx))
+                )
+                for idx in group
+            }, response_format=self._translation_response_format() if evaluate else None, model=self.models[tier]))
+        return responses
+
+    def batch_translate(self, queries: list) -> dict:
+        results = [None] * len(queries)
+        pending = list(range(len(queries)))
+        # whether an item is evaluated is decided once, its cascade tier moves up with its failed evaluations
+        checked = {idx for idx in pending if self._should_evaluate(queries[idx])}
+        failed_evals = [0] * len(queries)
+        tiers = [0] * len(queries)
+
+        for attempt in range(self.max_retries):
+            if not pending:
+                break
+
+            responses = self._batch_translations(queries, pending, checked, tiers, attempt)
+
+            translations = {}
+            eval_results = {}
+            still_pending = []
+            for idx in pending:
+                response = responses[f"translate-{idx}-{attempt}"]
+                if response is None:
+                    still_pending.append(idx)
+                    continue
+                self._record_translation_usage(response)
+                if self.self_eval and idx in checked:
+                    translations[idx], eval_results[idx], _ = self._handle_self_eval_response(response)
+                else:
+                    translations[idx] = response["response"]
+
+            evaluated = {idx: translation for idx, translation in translations.items() if idx in checked}
+            if evaluated and not self.self_eval:
+                eval_results = self._batch_evaluate(queries, evaluated)
+            for idx, translation in translations.items():
+                if idx not in checked:
+                    results[idx] = translation
+                    continue
+                if failed_evals[idx] == 0:
+                    self._record_eval_outcome(queries[idx], eval_results.get(idx))
+                if self._handle_eval_result(eval_results.get(idx), attempt):
+                    results[idx] = translation
+                else:
+                    failed_evals[idx] += 1
+                    tiers[idx] = self._translation_tier(queries[idx], failed_evals[idx], tiers[idx])
+                    still_pending.append(idx)
+
+            pending = sorted(still_pending)
+
+        return self._summary(results, len(queries), [idx in checked for idx in range(len(queries))])
@@ -0,0 +1,220 @@
+import io
+import json
+import time
+import asyncio
+import contextlib
+from collections import Counter
+import engine
+from artinya import Artinya
+from batch import BatchRunner
+from engine import Describe, TranslateEval
+from metrics import RunMetrics, format_table
+from mockserver import MockServer
+from ratelimit import RateLimiter
+
+# Offline benchmarks: Artinya.pipe / Describe / TranslateEval against a local MockServer, so throughput
+# and retry behaviour can be compared between commits without API costs or network noise.
+
+SAMPLE_TEXTS = [
+    "The Mona Lisa is a portrait painting by Leonardo da Vinci, depicting the subject with an enigmatic expression.",
+    "There is three manhwa that i find genuinely as funny as ged they are return of the mount hua sect, return of the mad demon and love advice from the great duke of hell.",
+    "Break a leg tonight, the whole family will be in the front row cheering for you.",
+    "The committee postponed the vote until every member had read the revised proposal.",
+    "Honestly the sequel was mid, but the soundtrack absolutely slaps.",
+]
+
+ABLATIONS = [
+    {"descriptions": True, "eval": True},
+    {"descriptions": True, "eval": False},
+    {"descriptions": False, "eval": True},
+    {"descriptions": False, "eval": False},
+]
+
+def sample_prompts(n):
+    # distinct texts, so dedup and the response cache don't hide any calls
+    return [f"{SAMPLE_TEXTS[idx % len(SAMPLE_TEXTS)]} ({idx})" for idx in range(n)]
+
+def use_server(server):
+    # Points every stage at the mock: fresh clients, no response cache, quick backoffs.
+    engine.configure_client(base_url=server.base_url, api_key="benchmark")
+    engine.set_cache(None)
+    engine.set_rate_limiter(RateLimiter(base_delay=0.05, max_delay=1.0))
+
+def _totals(metrics):
+    data = metrics.to_dict()
+    return {name: sum(values[name] for values in data.values()) for name in ("calls", "total_tokens", "retries", "backoffs")}
+
+def _distribution(retries):
+    # "retries:items" pairs, e.g. "0:45 1:4 2:1"
+    return " ".join(f"{count}:{items}" for count, items in sorted(Counter(retries).items()))
+
+class _PerItemRetries:
+    # on_result hook that attributes the retries recorded since the previous item to the item just finished.
+    # With pack_size > 1 a packed group's retries land on its first item.
+    def __init__(self, metrics, stages):
+        self.metrics = metrics
+        self.stages = stages
+        self.last = self._now()
+        self.retries = {stage: [] for stage in stages}
+
+    def _now(self):
+        return {stage: self.metrics.get(stage, "retries") for stage in self.stages}
+
+    def __call__(self, idx, *result):
+        now = self._now()
+        for stage in self.stages:
+            self.retries[stage].append(now[stage] - self.last[stage])
+        self.last = now
+
+def bench_pipe(prompts, mode="pipe", **artinya_kwargs):
+    # End-to-end throughput of one Artinya configuration.
+    artinya = Artinya(src_lang="English", dest_lang="Indonesian", **artinya_kwargs)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "apipe":
+            asyncio.run(artinya.apipe(prompts, verbose=False))
+        elif mode == "batch":
+            artinya.batch_pipe(prompts, verbose=False, runner=BatchRunner(poll_interval=0.05))
+        else:
+            artinya.pipe(prompts, verbose=False)
+    seconds = time.perf_counter() - started
+
+    totals = _totals(artinya.metrics)
+    n = len(prompts)
+    return {
+        "items": n,
+        "seconds": seconds,
+        "items_per_sec": n / seconds,
+        "calls_per_item": totals["calls"] / n,
+        "tokens_per_item": totals["total_tokens"] / n,
+        "retries_per_item": totals["retries"] / n,
+        "backoffs_per_item": totals["backoffs"] / n,
+    }
+
+def bench_stages(prompts, descriptions=True, eval=True, max_retries=5, **stage_kwargs):
+    # Per-item retry distributions of Describe and TranslateEval run on their own.
+    metrics = RunMetrics()
+    distributions = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        desc_results = None
+        if descriptions:
+            hook = _PerItemRetries(metrics, ["describe"])
+            desc_results = Describe(max_retries=max_retries, metrics=metrics, **stage_kwargs).describe(prompts, on_result=hook)
+            distributions.update(hook.retries)
+
+        stages = ["translate", "evaluate"] if eval else ["translate"]
+        hook = _PerItemRetries(metrics, stages)
+        translator = TranslateEval("English", "Indonesian", descriptions=desc_results, max_retries=max_retries, eval=eval, metrics=metrics, **stage_kwargs)
+        translator.translate(prompts, on_result=hook)
+        distributions.update(hook.retries)
+    return {stage: _distribution(retries) for stage, retries in distributions.items()}
+
+def run_matrix(n_items=50, mode="pipe", server_kwargs=None, **artinya_kwargs):
+    # One row per descriptions/eval combination, each against a fresh MockServer with the same seed.
+    prompts = sample_prompts(n_items)
+    rows = []
+    for ablation in ABLATIONS:
+        with MockServer(**(server_kwargs or {})) as server:
+            use_server(server)
+            row = {**ablation, **bench_pipe(prompts, mode=mode, **ablation, **artinya_kwargs)}
+
+        stage_kwargs = {key: artinya_kwargs[key] for key in ("max_retries", "structured", "pack_size") if key in artinya_kwargs}
+        with MockServer(**(server_kwargs or {})) as server:
+            use_server(server)
+            row["retry_distribution"] = bench_stages(prompts, **ablation, **stage_kwargs)
+        rows.append(row)
+    return rows
+
+def check_batch(n_items=20, max_retries=8, malformed_rate=0.2, no_rate=0.2, seed=0):
+    # batch_pipe end to end against the mock's files/batches endpoints. Malformed and "no" answers make
+    # some items go into follow-up retry batches; returns the number of batch jobs, the jobs a run without
+    # retries would need (describe, translate, evaluate) and the items that never finished.
+    prompts = sample_prompts(n_items)
+    with MockServer(latency=0.0, malformed_rate=malformed_rate, no_rate=no_rate, seed=seed) as server:
+        use_server(server)
+        artinya = Artinya(src_lang="English", dest_lang="Indonesian", max_retries=max_retries)
+        with contextlib.redirect_stdout(io.StringIO()):
+            desc_results, translate_results = artinya.batch_pipe(prompts, verbose=False, runner=BatchRunner(poll_interval=0.01))
+        batches = server.requests["batches"]
+    return {
+        "batches": batches,
+        "phases": 3,
+        "unfinished_descriptions": sum(result is None for result in desc_results["results"]),
+        "unfinished_translations": sum(result is None for result in translate_results["results"])
+    }
+
+def format_rows(rows):
+    return format_table(
+        ["Descriptions", "Eval", "Items/s", "Calls/item", "Tokens/item", "Retries/item", "Backoffs/item", "Retry distribution (retries:items)"],
+        [
+            [
+                row["descriptions"], row["eval"], f"{row['items_per_sec']:.2f}", f"{row['calls_per_item']:.2f}",
+                f"{row['tokens_per_item']:.0f}", f"{row['retries_per_item']:.2f}", f"{row.get('backoffs_per_item', 0):.2f}",
+                ", ".join(f"{stage} {distribution}" for stage, distribution in row["retry_distribution"].items())
+            ]
+            for row in rows
+        ]
+    )
+
+def regressions(rows, baseline_rows, tolerance=0.2):
+    # Configurations whose items/sec dropped by more than `tolerance` against a saved run.
+    baseline = {(row["descriptions"], row["eval"]): row for row in baseline_rows}
+    slower = []
+    for row in rows:
+        previous = baseline.get((row["descriptions"], row["eval"]))
+        if previous is not None and row["items_per_sec"] < previous["items_per_sec"] * (1 - tolerance):
+            slower.append((row, previous))
+    return slower
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline Artinya benchmark against a local mock server")
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--mode", choices=["pipe", "apipe", "batch"], default="pipe")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--structured", action="store_true")
+    parser.add_argument("--pack-size", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per mock request")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    parser.add_argument("--no-rate", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the rows as JSON to this file")
+    parser.add_argument("--baseline", help="JSON rows from an earlier --output run to compare items/sec against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--check-batch", action="store_true", help="only check batch_pipe and its retry batches against the mock")
+    args = parser.parse_args()
+
+    if args.check_batch:
+        result = check_batch(n_items=args.items, malformed_rate=args.malformed_rate, no_rate=args.no_rate, seed=args.seed)
+        print(f"{result['batches']} batch jobs for {result['phases']} phases, "
+              f"{result['unfinished_descriptions']} unfinished descriptions, {result['unfinished_translations']} unfinished translations")
+        if result["batches"] <= result["phases"] or result["unfinished_descriptions"] or result["unfinished_translations"]:
+            print("Batch check failed: expected retry batches and every item finished")
+            raise SystemExit(1)
+        raise SystemExit(0)
+
+    server_kwargs = {
+        "latency": args.latency, "jitter": args.jitter, "malformed_rate": args.malformed_rate,
+        "no_rate": args.no_rate, "error_rate": args.error_rate, "seed": args.seed
+    }
+    rows = run_matrix(
+        n_items=args.items, mode=args.mode, server_kwargs=server_kwargs,
+        max_retries=args.max_retries, structured=args.structured, pack_size=args.pack_size
+    )
+    print(format_rows(rows))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(rows, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            slower = regressions(rows, json.load(file), args.tolerance)
+        for row, previous in slower:
+            print(f"Regression: descriptions={row['descriptions']} eval={row['eval']} "
+                  f"{row['items_per_sec']:.2f} items/s vs {previous['items_per_sec']:.2f} before")
+        if slower:
+            raise SystemExit(1)
@@ -0,0 +1,89 @@
+import re
+from packing import estimate_tokens
+
+PARAGRAPH_BREAK = r'(\n\s*\n)'
+# Western terminators need whitespace after them, CJK ones usually have none, so they also break with zero width
+SENTENCE_BREAK = r'((?<=[.!?])\s+|(?<=[。！？])(?![。！？])\s*)'
+
+def _units(text):
+    # [(sentence, whitespace that followed it)], paragraph breaks are kept as the separator of
+    # the paragraph's last sentence so reassembly restores the layout.
+    units = []
+    paragraphs = re.split(PARAGRAPH_BREAK, text)
+    for n in range(0, len(paragraphs), 2):
+        paragraph_break = paragraphs[n + 1] if n + 1 < len(paragraphs) else ""
+        sentences = re.split(SENTENCE_BREAK, paragraphs[n])
+        paragraph_units = [
+            (sentences[m], sentences[m + 1] if m + 1 < len(sentences) else "")
+            for m in range(0, len(sentences), 2) if sentences[m]
+        ]
+        # the break goes on the last non-empty sentence, whatever whitespace trailed it
+        if paragraph_units and paragraph_break:
+            paragraph_units[-1] = (paragraph_units[-1][0], paragraph_break)
+        units += paragraph_units
+    return units
+
+def _split_long(sentence, separator, token_budget):
+    # A single sentence over the budget is cut between words, and a word (or a run of text without
+    # spaces, as in Chinese and Japanese) that is still over the budget is cut between characters.
+    max_chars = max(1, (token_budget - 1) * 4) # the longest text estimate_tokens keeps within the budget
+    pieces, current = [], ""
+    for word in sentence.split(" "):
+        candidate = f"{current} {word}" if current else word
+        if current and estimate_tokens(candidate) > token_budget:
+            pieces.append((current, " "))
+            candidate = word
+        while estimate_tokens(candidate) > token_budget:
+            pieces.append((candidate[:max_chars], ""))
+            candidate = candidate[max_chars:]
+        current = candidate
+    pieces.append((current, separator))
+    return pieces
+
+def split_document(text, token_budget=800):
+    # Splits `text` into chunks of at most `token_budget` estimated tokens, only at sentence or paragraph
+    # boundaries (or between words, then characters, for a sentence that is too long on its own). A paragraph break is
+    # preferred once a chunk is at least half full. Returns (chunks, separators) with
+    # "".join(chunk + separator) == text, give or take surrounding whitespace.
+    units = []
+    for sentence, separator in _units(text.strip()):
+        if estimate_tokens(sentence) > token_budget:
+            units += _split_long(sentence, separator, token_budget)
+        else:
+            units.append((sentence, separator))
+
+    chunks, separators = [], []
+    current = ""
+    for n, (sentence, separator) in enumerate(units):
+        current += sentence
+        next_tokens = estimate_tokens(current + separator + units[n + 1][0]) if n + 1 < len(units) else None
+        paragraph_end = "\n" in separator
+        if next_tokens is None or next_tokens > token_budget or (paragraph_end and estimate_tokens(current) >= token_budget // 2):
+            chunks.append(current)
+            separators.append(separator)
+            current = ""
+        else:
+            current += separator
+    return chunks, separators
+
+def join_chunks(chunks, separators):
+    return "".join(chunk + separator for chunk, separator in zip(chunks, separators)).strip()
+
+def neighbour_context(chunks, idx, chars=200):
+    # (end of the previous chunk, start of the next chunk), cut to whole words
+    before = chunks[idx - 1][-chars:] if idx > 0 else ""
+    after = chunks[idx + 1][:chars] if idx + 1 < len(chunks) else ""
+    if before and len(chunks[idx - 1]) > chars:
+        before = before.split(" ", 1)[-1]
+    if after and len(chunks[idx + 1]) > chars:
+        after = after.rsplit(" ", 1)[0]
+    return before, after
+
+def document_head(chunks, token_budget=2000):
+    # The leading chunks that fit in `token_budget`, enough to describe the style and tone of the document.
+    head = []
+    for chunk in chunks:
+        if head and estimate_tokens("\n".join(head + [chunk])) > token_budget:
+            break
+        head.append(chunk)
+    return "\n".join(head)
@@ -0,0 +1,91 @@
+import asyncio
+import argparse
+from artinya import Artinya
+from policy import AdaptiveEvalPolicy
+from sources import read_texts
+from sinks import open_sink
+
+# Streams a corpus file through Artinya and writes every result as soon as it is done:
+#   python cli.py corpus.parquet results.jsonl --column text --src english --dest indonesia
+# Input: .txt (one text per line), .csv, .jsonl, .parquet. Output: .csv, .jsonl, .parquet.
+# Rows are read in bounded batches and written incrementally, so memory stays flat for any file size.
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Translate a corpus file with Artinya")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--src", dest="src_lang", default="english")
+    parser.add_argument("--dest", dest="dest_lang", default="indonesia")
+    parser.add_argument("--column", default="text", help="text column/field for csv, jsonl and parquet input")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows read from the input at a time")
+    parser.add_argument("--concurrency", type=int, default=16, help="rows in flight, 1 processes them one by one in input order")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--no-descriptions", action="store_true")
+    parser.add_argument("--no-eval", action="store_true")
+    parser.add_argument("--structured", action="store_true")
+    parser.add_argument("--self-eval", action="store_true")
+    parser.add_argument("--describe-model")
+    parser.add_argument("--translate-model", action="append", help="repeat for a cascade, cheapest first")
+    parser.add_argument("--eval-model")
+    parser.add_argument("--escalate-after", type=_at_least_one, default=1, help="failed evaluations before moving up the cascade")
+    parser.add_argument("--adaptive-eval", action="store_true", help="skip evaluation of short inputs and of input classes that keep passing")
+    parser.add_argument("--audit-log", help="JSONL file for escalation and evaluation policy decisions")
+    parser.add_argument("--cache", help="path of the sqlite response cache")
+    parser.add_argument("--rpm", type=int)
+    parser.add_argument("--tpm", type=int)
+    parser.add_argument("--progress", type=int, default=1000, help="print a progress line every N rows, 0 disables")
+    parser.add_argument("--quiet", action="store_true", help="don't print the metrics summary at the end")
+    return parser
+
+def _at_least_one(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def _progress(count, every):
+    if every and count % every == 0:
+        print(f"{count} rows done")
+
+def _models(args):
+    models = {"describe": args.describe_model, "translate": args.translate_model, "evaluate": args.eval_model}
+    return {stage: model for stage, model in models.items() if model}
+
+def run(args):
+    artinya = Artinya(
+        src_lang=args.src_lang,
+        dest_lang=args.dest_lang,
+        max_retries=args.max_retries,
+        descriptions=not args.no_descriptions,
+        eval=not args.no_eval,
+        max_concurrency=args.concurrency,
+        cache=args.cache,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        structured=args.structured,
+        self_eval=args.self_eval,
+        models=_models(args),
+        escalate_after=args.escalate_after,
+        eval_policy=AdaptiveEvalPolicy() if args.adaptive_eval else None,
+        audit_log=args.audit_log
+    )
+    texts = read_texts(args.input, column=args.column, batch_size=args.batch_size)
+
+    with open_sink(args.output) as sink:
+        if args.concurrency > 1:
+            async def consume():
+                count = 0
+                async for _ in artinya.astream(texts, sink=sink, verbose=not args.quiet):
+                    count += 1
+                    _progress(count, args.progress)
+            asyncio.run(consume())
+        else:
+            for count, _ in enumerate(artinya.stream(texts, sink=sink, verbose=not args.quiet), start=1):
+                _progress(count, args.progress)
+    return artinya
+
+def main(argv=None):
+    run(build_parser().parse_args(argv))
+
+if __name__ == "__main__":
+    main()
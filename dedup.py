@@ -0,0 +1,87 @@
+import re
+import random
+import hashlib
+import unicodedata
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+def normalize(text):
+    # Unicode form and whitespace differences don't change what gets translated. Case does ("US" vs "us"),
+    # so exact dedup keeps it.
+    return re.sub(r'\s+', ' ', unicodedata.normalize("NFKC", text)).strip()
+
+def text_hash(text):
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+
+def dedupe(prompts):
+    # Returns (unique prompts, positions) with positions[i] = index of prompts[i] in the unique list.
+    # The first occurrence of each normalized text is the one that gets sent.
+    unique, positions, seen = [], [], {}
+    for prompt in prompts:
+        key = text_hash(prompt)
+        if key not in seen:
+            seen[key] = len(unique)
+            unique.append(prompt)
+        positions.append(seen[key])
+    return unique, positions
+
+def expand(results, positions):
+    # Fans a stage result dict computed on the unique list back out to every original position.
+    expanded = {**results, "results": [results["results"][position] for position in positions]}
+    if "evaluated" in results:
+        expanded["evaluated"] = [results["evaluated"][position] for position in positions]
+    return expanded
+
+class MinHash:
+    # MinHash signatures over character shingles of the normalized text.
+    def __init__(self, num_perm=64, shingle_size=5, seed=42):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self.permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    def _shingles(self, text):
+        text = normalize(text).casefold() # case is fine to ignore for reusing a description
+        if len(text) <= self.shingle_size:
+            return {text}
+        return {text[i:i + self.shingle_size] for i in range(len(text) - self.shingle_size + 1)}
+
+    def signature(self, text):
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big") for shingle in self._shingles(text)]
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.permutations]
+
+    @staticmethod
+    def similarity(signature_a, signature_b):
+        # estimated Jaccard similarity of the two shingle sets
+        return sum(a == b for a, b in zip(signature_a, signature_b)) / len(signature_a)
+
+def near_duplicate_representatives(texts, threshold=0.8, num_perm=64, bands=16):
+    # Returns representatives[i] = index of the text whose description texts[i] can reuse (i itself for
+    # cluster representatives). LSH banding finds candidates, which are then checked against the
+    # representative's signature directly, so clusters don't drift through chains of near matches.
+    minhash = MinHash(num_perm=num_perm)
+    rows = num_perm // bands
+    buckets = {}
+    signatures = []
+    representatives = []
+
+    for idx, text in enumerate(texts):
+        signature = minhash.signature(text)
+        signatures.append(signature)
+
+        band_keys = [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(bands)]
+        candidates = sorted({candidate for key in band_keys for candidate in buckets.get(key, [])})
+
+        representative = idx
+        for candidate in candidates:
+            if MinHash.similarity(signature, signatures[candidate]) >= threshold:
+                representative = candidate
+                break
+        representatives.append(representative)
+
+        if representative == idx:
+            # only representatives are indexed, members are matched through them
+            for key in band_keys:
+                buckets.setdefault(key, []).append(idx)
+
+    return representatives
@@ -1,52 +1,352 @@
 import re
 import os
-from openai import OpenAI
+import json
+import time
+import asyncio
+import threading
+import weakref
+import httpx
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    DefaultHttpxClient,
+    DefaultAsyncHttpxClient,
+    RateLimitError,
+    APIConnectionError,
+    InternalServerError
+)
 from dotenv import load_dotenv
+from packing import estimate_tokens, pack, format_packed, split_packed
+from chunking import neighbour_context
+from ratelimit import RateLimiter
+from metrics import RunMetrics
+from policy import DecisionLog
+from templates import (
+    DESCRIBE_TEMPLATE,
+    DESCRIBE_PACKED_TEMPLATE,
+    TRANSLATE_TEMPLATE,
+    TRANSLATE_NO_DESC_TEMPLATE,
+    TRANSLATE_PACKED_TEMPLATE,
+    TRANSLATE_REPAIR_TEMPLATE,
+    EVALUATE_TEMPLATE,
+    EVALUATE_PACKED_TEMPLATE,
+    EVALUATE_CANDIDATES_TEMPLATE,
+    TRANSLATE_CHUNK_TEMPLATE,
+    TRANSLATE_CHUNK_REPAIR_TEMPLATE
+)
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API")
+MODEL = "gpt-4o-mini"
 
-def llm(system_prompt, query_prompt, parse=True) :
+# Connection pool settings shared by every stage. Override with configure_client() or the env vars.
+CLIENT_CONFIG = {
+    "pool_size": int(os.getenv("ARTINYA_POOL_SIZE", "64")),
+    "timeout": float(os.getenv("ARTINYA_TIMEOUT", "60")),
+    "connect_timeout": float(os.getenv("ARTINYA_CONNECT_TIMEOUT", "10")),
+    "base_url": os.getenv("OPENAI_BASE_URL"),
+}
+
+_client = None
+_async_clients = weakref.WeakKeyDictionary() # event loop -> AsyncOpenAI, httpx async pools can't cross loops
+_client_lock = threading.Lock()
+_cache = None
+
+# Shared by every stage in the process. ARTINYA_RPM / ARTINYA_TPM turn on client-side pacing,
+# 429 and transient-error backoff is always on.
+_rate_limiter = RateLimiter(
+    rpm=int(os.getenv("ARTINYA_RPM", "0")) or None,
+    tpm=int(os.getenv("ARTINYA_TPM", "0")) or None
+)
+COMPLETION_TOKENS_ESTIMATE = 512 # counted against TPM before the call, reconciled with real usage after it
+
+# APITimeoutError is a subclass of APIConnectionError
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+def _http_options():
+    # Pool limits go on the http client, the timeout on the SDK client: the SDK sends its own timeout with
+    # every request, which would override one set on the http client.
+    pool_size = CLIENT_CONFIG["pool_size"]
+    return {"limits": httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)}
+
+def _timeout():
+    return httpx.Timeout(CLIENT_CONFIG["timeout"], connect=CLIENT_CONFIG["connect_timeout"])
+
+def configure_client(pool_size=None, timeout=None, connect_timeout=None, base_url=None, api_key=None):
+    # Changes the pool settings; clients are rebuilt lazily on the next call.
+    global _client, OPENAI_API_KEY
+    with _client_lock:
+        if api_key is not None:
+            OPENAI_API_KEY = api_key
+        if pool_size is not None:
+            CLIENT_CONFIG["pool_size"] = pool_size
+        if timeout is not None:
+            CLIENT_CONFIG["timeout"] = timeout
+        if connect_timeout is not None:
+            CLIENT_CONFIG["connect_timeout"] = connect_timeout
+        if base_url is not None:
+            CLIENT_CONFIG["base_url"] = base_url
+        
+        if _client is not None:
+            _client.close()
+        _client = None
+        _async_clients.clear()
+
+def get_client():
+    # One long-lived OpenAI client per process. httpx.Client is thread-safe, so threads share its keep-alive pool.
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(
+                    api_key=OPENAI_API_KEY,
+                    base_url=CLIENT_CONFIG["base_url"],
+                    timeout=_timeout(),
+                    max_retries=0, # retries go through the shared RateLimiter instead
+                    http_client=DefaultHttpxClient(**_http_options())
+                )
+    return _client
+
+def get_async_client():
+    # One long-lived AsyncOpenAI client per running event loop.
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=CLIENT_CONFIG["base_url"],
+                timeout=_timeout(),
+                max_retries=0, # retries go through the shared RateLimiter instead
+                http_client=DefaultAsyncHttpxClient(**_http_options())
+            )
+            _async_clients[loop] = client
+    return client
+
+def _messages(system_prompt, query_prompt):
+    return [
+        {
+            "role": "system", 
+            "content": f"{system_prompt}"},
+        {
+            "role": "user",
+            "content": f"{query_prompt}"
+        }
+    ]
+
+def _parse_completion(completion, latency=None, model=None, backoffs=0):
+    return {
+        "response": completion.choices[0].message.content,
+        "responses": [choice.message.content for choice in completion.choices], # all n choices
+        "used_prompt_tokens": completion.usage.prompt_tokens,
+        "used_completion_tokens": completion.usage.completion_tokens,
+        "total_used_tokens": completion.usage.total_tokens,
+        "cached_prompt_tokens": completion.usage.prompt_tokens_details.cached_tokens,
+        "cache_hit": False,
+        "latency": latency, # seconds for the whole call, including rate-limit waits and backoffs
+        "model": model,
+        "backoffs": backoffs # 429s and transient errors retried inside the rate limiter
+    }
+
+def set_cache(cache):
+    # Puts a ResponseCache (see cache.py) in front of llm()/allm(). Pass None to disable.
+    global _cache
+    _cache = cache
+
+def get_cache():
+    return _cache
+
+def _request_params(response_format=None, n=1):
+    params = {}
+    if response_format is not None:
+        params["response_format"] = response_format
+    if n > 1:
+        params["n"] = n
+    return params
+
+def _cache_lookup(messages, parse, bypass_cache, response_format=None, n=1, model=None):
+    # Returns (key, cached response). Only parsed responses are cached.
+    if _cache is None or not parse:
+        return None, None
+    
+    key = _cache.key(model or MODEL, messages, **_request_params(response_format, n))
+    if bypass_cache:
+        return key, None
+    
+    cached = _cache.get(key)
+    if cached is None:
+        return key, None
+    
+    # a hit costs no tokens, so it is reported as zero usage
+    return key, {
+        **cached,
+        "used_prompt_tokens": 0,
+        "used_completion_tokens": 0,
+        "total_used_tokens": 0,
+        "cached_prompt_tokens": 0,
+        "cache_hit": True,
+        "latency": 0.0,
+        "backoffs": 0
+    }
+
+def set_rate_limiter(rate_limiter):
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+def get_rate_limiter():
+    return _rate_limiter
+
+def _estimate_request_tokens(messages):
+    return sum(estimate_tokens(message["content"]) for message in messages) + COMPLETION_TOKENS_ESTIMATE
+
+def _error_headers(error):
+    response = getattr(error, "response", None)
+    return response.headers if response is not None else {}
+
+def _create(messages, response_format=None, n=1, model=None):
+    # chat.completions.create paced by the shared RateLimiter. 429s and transient errors are retried
+    # with backoff, the last error is raised once the limiter's retries are used up.
+    # Returns (completion, number of backoffs it took).
+    limiter = _rate_limiter
+    estimated = _estimate_request_tokens(messages)
+    for attempt in range(limiter.max_retries + 1):
+        limiter.acquire(estimated)
+        try:
+            raw = get_client().chat.completions.with_raw_response.create(model=model or MODEL, messages=messages, **_request_params(response_format, n))
+        except RETRYABLE_ERRORS as e:
+            if attempt == limiter.max_retries:
+                raise
+            delay = limiter.backoff(attempt, _error_headers(e))
+            print(f"API busy ({type(e).__name__}), backing off {delay:.1f}s...")
+            continue
+        
+        limiter.update_from_headers(raw.headers)
+        completion = raw.parse()
+        limiter.reconcile(estimated, completion.usage.total_tokens)
+        return completion, attempt # attempt = backoffs before this one went through
+
+async def _acreate(messages, response_format=None, n=1, model=None):
+    limiter = _rate_limiter
+    estimated = _estimate_request_tokens(messages)
+    for attempt in range(limiter.max_retries + 1):
+        await limiter.aacquire(estimated)
+        try:
+            raw = await get_async_client().chat.completions.with_raw_response.create(model=model or MODEL, messages=messages, **_request_params(response_format, n))
+        except RETRYABLE_ERRORS as e:
+            if attempt == limiter.max_retries:
+                raise
+            delay = limiter.backoff(attempt, _error_headers(e))
+            print(f"API busy ({type(e).__name__}), backing off {delay:.1f}s...")
+            continue
+        
+        limiter.update_from_headers(raw.headers)
+        completion = raw.parse()
+        limiter.reconcile(estimated, completion.usage.total_tokens)
+        return completion, attempt # attempt = backoffs before this one went through
+
+def llm(system_prompt, query_prompt, parse=True, bypass_cache=False, response_format=None, n=1, model=None) :
+    # bypass_cache skips the lookup but still stores the fresh answer, so retries replace a bad cached one.
+    # response_format is passed through to the API (e.g. a JSON schema for structured outputs).
+    # n > 1 samples several choices in one call, they are all in response["responses"].
+    # model overrides the module-wide MODEL for this call (per-stage models, cascades).
     try:
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": f"{system_prompt}"},
-                {
-                    "role": "user",
-                    "content": f"{query_prompt}"
-                }
-            ]
-        )
+        messages = _messages(system_prompt, query_prompt)
+        key, cached = _cache_lookup(messages, parse, bypass_cache, response_format, n, model)
+        if cached is not None:
+            return cached
+        
+        started = time.perf_counter()
+        completion, backoffs = _create(messages, response_format, n, model)
         if parse:
-            return {
-                "response": completion.choices[0].message.content,
-                "used_prompt_tokens": completion.usage.prompt_tokens,
-                "used_completion_tokens": completion.usage.completion_tokens,
-                "total_used_tokens": completion.usage.total_tokens,
-                "cached_prompt_tokens": completion.usage.prompt_tokens_details.cached_tokens
-            }
+            response = _parse_completion(completion, time.perf_counter() - started, model or MODEL, backoffs)
+            if key is not None:
+                _cache.set(key, response)
+            return response
         return completion
     except Exception as e:
         print(f"An error occurred while calling the OpenAI API: {e}")
         return None
 
+async def allm(system_prompt, query_prompt, parse=True, bypass_cache=False, response_format=None, n=1, model=None):
+    # Same contract as llm(), but awaitable so many requests can be in flight at once.
+    try:
+        messages = _messages(system_prompt, query_prompt)
+        key, cached = _cache_lookup(messages, parse, bypass_cache, response_format, n, model)
+        if cached is not None:
+            return cached
+        
+        started = time.perf_counter()
+        completion, backoffs = await _acreate(messages, response_format, n, model)
+        if parse:
+            response = _parse_completion(completion, time.perf_counter() - started, model or MODEL, backoffs)
+            if key is not None:
+                _cache.set(key, response)
+            return response
+        return completion
+    except Exception as e:
+        print(f"An error occurred while calling the OpenAI API: {e}")
+        return None
+
+def _run_calls(calls):
+    # Drives a generator of API calls (e.g. TranslateEval._translate_calls): every yielded dict is llm()'s
+    # keyword arguments and gets llm()'s response sent back. Returns what the generator returns.
+    # The retry logic lives in the generator once and _arun_calls runs the same one with allm().
+    try:
+        request = next(calls)
+        while True:
+            request = calls.send(llm(**request))
+    except StopIteration as done:
+        return done.value
+
+async def _arun_calls(calls):
+    try:
+        request = next(calls)
+        while True:
+            request = calls.send(await allm(**request))
+    except StopIteration as done:
+        return done.value
+
+async def _gather_bounded(coros_fn, items, max_concurrency):
+    # Runs coros_fn(idx, item) for every item with at most `max_concurrency` in flight.
+    # asyncio.gather keeps the results in input order.
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def run(idx, item):
+        async with semaphore:
+            return await coros_fn(idx, item)
+    
+    return await asyncio.gather(*(run(idx, item) for idx, item in enumerate(items)))
+
+def _parse_json(text):
+    # Structured-output responses; a refusal or truncated answer parses to {} and is retried like a missing token.
+    try:
+        parsed_results = json.loads(text)
+    except (TypeError, json.JSONDecodeError):
+        return {}
+    return parsed_results if isinstance(parsed_results, dict) else {}
+
 class Describe:
-    # Class-level variables are maintained per session, reflecting whole data description task.
-    from prompts import DESCRIBE_SYSTEM_PROMPT, DESCRIBE_MAIN_PROMPT
+    # Token, retry and latency numbers go into `metrics` (a RunMetrics, see metrics.py) under the
+    # "describe" stage. Pass the same RunMetrics to every stage of a run to get one report for it.
+    # Prompts come from templates.py: static system prompt + prefix, per-item content at the tail.
+    describe_template = DESCRIBE_TEMPLATE
+    describe_packed_template = DESCRIBE_PACKED_TEMPLATE
+    from prompts import DESCRIBE_SCHEMA
     
-    completion_tokens = 0
-    prompt_tokens = 0
-    cached_tokens = 0
-    total_tokens = 0
-    total_retry_attempts = 0
+    stage = "describe"
     
-    def __init__(self, max_retries=5, src_lang="English"): #TODO: Later use ISO 639 language codes instead.. so I will have to map them to the language names 
+    def __init__(self, max_retries=5, src_lang="English", pack_size=1, pack_token_budget=2000, structured=False, metrics=None, model=None): #TODO: Later use ISO 639 language codes instead.. so I will have to map them to the language names 
+        self.metrics = metrics if metrics is not None else RunMetrics()
         self.max_retries = max_retries
         self.src_lang = src_lang
+        self.DESCRIBE_SYSTEM_PROMPT = self.describe_template.system_prompt(SRC_LANG=src_lang)
+        # pack_size > 1 describes up to that many inputs (within pack_token_budget estimated tokens) per request
+        self.pack_size = pack_size
+        self.pack_token_budget = pack_token_budget
+        # structured=True asks for JSON schema output instead of <<Label>> sections (packing is not used then)
+        self.structured = structured
+        self.response_format = self.DESCRIBE_SCHEMA if structured else None
+        self.model = model # None uses engine.MODEL
         
     def _parse_analysis(self, text):
         pattern = r'<<(\w+)>>:\s*(.*?)\s*(?=<<\w+>>:|$)'
@@ -59,139 +359,455 @@ class Describe:
         
         return parsed_results
 
+    def _parse_packed_analysis(self, text):
+        # item number -> parsed analysis, for a response to the packed describe prompt
+        return {n: self._parse_analysis(section) for n, section in split_packed(text).items()}
+
     def _has_required_tokens(self, parsed_results):
         required_tokens = ["Style", "Tone", "Nuances", "Intent", "CulturalMeaning", "Symbolism"]
         return all(token in parsed_results for token in required_tokens)
 
+    def _record_usage(self, response):
+        # response is None for a failed call
+        self.metrics.record_call(self.stage, response)
+
+    def _record_retry(self):
+        self.metrics.record_retry(self.stage)
+
+    def _query_prompt(self, prompt):
+        return self.describe_template.query_prompt(SRC_LANG=self.src_lang, QUERY=prompt)
+
+    def _handle_response(self, response, attempt):
+        # Returns the parsed analysis, or None when this attempt has to be retried.
+        self._record_usage(response)
+        if response is None:
+            self._record_retry()
+            print(f"Attempt {attempt + 1}/{self.max_retries} | failed: API error, retrying...")
+            return None
+        
+        response_text = response["response"]
+        parsed_results = _parse_json(response_text) if self.structured else self._parse_analysis(response_text)
+
+        if self._has_required_tokens(parsed_results):
+            return parsed_results
+        else:
+            self._record_retry()
+            print(f"Attempt {attempt + 1}/{self.max_retries} | failed: Missing tokens, retrying...")
+            return None
+
     def _get_structured_response(self, prompt):
         for attempt in range(self.max_retries):
-            response = llm(system_prompt=self.DESCRIBE_SYSTEM_PROMPT, query_prompt=self.DESCRIBE_MAIN_PROMPT.format(QUERY=prompt, SRC_LANG=self.src_lang))
-            
-            self.completion_tokens += response["used_completion_tokens"]
-            self.prompt_tokens += response["used_prompt_tokens"]
-            self.cached_tokens += response["cached_prompt_tokens"]
-            self.total_tokens += response["total_used_tokens"]
-            
-            response_text = response["response"]
-            parsed_results = self._parse_analysis(response_text)
-
-            if self._has_required_tokens(parsed_results):
+            # a retry must not get the same unparseable answer back from the cache
+            response = llm(system_prompt=self.DESCRIBE_SYSTEM_PROMPT, query_prompt=self._query_prompt(prompt), bypass_cache=attempt > 0, response_format=self.response_format, model=self.model)
+            parsed_results = self._handle_response(response, attempt)
+            if parsed_results is not None:
                 return parsed_results
-            else:
-                self.total_retry_attempts += 1
-                print(f"Attempt {attempt + 1}/{self.max_retries} | failed: Missing tokens, retrying...")
 
         return None # bad response 😞
     
-    def describe(self, prompts: list) -> dict:
-        results = []
+    def counters(self):
+        return {self.stage: self.metrics.counters(self.stage)}
+    
+    def _describe_packed(self, prompts, group):
+        # One request for the whole group. Items whose section is missing or malformed are
+        # unpacked and described on their own. Returns idx -> description.
+        response = llm(
+            system_prompt=self.DESCRIBE_SYSTEM_PROMPT,
+            query_prompt=self.describe_packed_template.query_prompt(SRC_LANG=self.src_lang, QUERIES=format_packed([prompts[idx] for idx in group])),
+            model=self.model
+        )
+        self._record_usage(response)
+        parsed_items = {}
+        if response is not None:
+            parsed_items = self._parse_packed_analysis(response["response"])
+        
+        results = {}
+        for n, idx in enumerate(group, start=1):
+            parsed_results = parsed_items.get(n, {})
+            if self._has_required_tokens(parsed_results):
+                results[idx] = parsed_results
+            else:
+                self._record_retry()
+                print(f"Packed item {n}/{len(group)} | failed: Missing tokens, retrying on its own...")
+                results[idx] = self._get_structured_response(prompts[idx])
+        return results
+
+    def describe(self, prompts: list, done=None, on_result=None) -> dict:
+        # done: idx -> already known description (e.g. from a resume journal), those items are skipped.
+        # on_result(idx, description) is called after each newly described item.
+        results = [None] * len(prompts)
+        pending = []
+        
+        for idx in range(len(prompts)):
+            if done is not None and idx in done:
+                results[idx] = done[idx]
+            else:
+                pending.append(idx)
         
-        for prompt in prompts:
-            results.append(self._get_structured_response(prompt))
+        pack_size = 1 if self.structured else self.pack_size
+        for group in pack(prompts, pending, pack_size, self.pack_token_budget):
+            if len(group) == 1:
+                group_results = {group[0]: self._get_structured_response(prompts[group[0]])}
+            else:
+                group_results = self._describe_packed(prompts, group)
+            
+            for idx in group:
+                results[idx] = group_results[idx]
+                if on_result is not None:
+                    on_result(idx, results[idx])
         
+        return self._summary(results, len(prompts))
+
+    def _summary(self, results, n):
+        counters = self.metrics.counters(self.stage)
         return {
             "results": results,
-            "completion_tokens": self.completion_tokens,
-            "prompt_tokens": self.prompt_tokens,
-            "cached_tokens": self.cached_tokens,
-            "total_tokens": self.total_tokens,
-            "total_retry_attempts": self.total_retry_attempts,
-            "average_retry_attempts": self.total_retry_attempts / len(prompts)
+            "completion_tokens": counters["completion_tokens"],
+            "prompt_tokens": counters["prompt_tokens"],
+            "cached_tokens": counters["cached_tokens"],
+            "total_tokens": counters["total_tokens"],
+            "total_retry_attempts": counters["retries"],
+            "average_retry_attempts": counters["retries"] / n if n else 0.0,
+            "cache_hits": counters["cache_hits"],
+            "cache_misses": counters["cache_misses"]
         }
         
 class TranslateEval:
-    # Class-level variables are maintained per session, reflecting whole data description task.
+    # Token, retry and latency numbers go into `metrics` (a RunMetrics, see metrics.py) under the
+    # "translate" and "evaluate" stages.
     from prompts import (
-            TRANSLATE_SYSTEM_PROMPT, 
-            TRANSLATE_MAIN_PROMPT, 
-            TRANSLATE_MAIN_NO_DESC_PROMPT,
+            TRANSLATE_SYSTEM_PROMPT,
             EVALUATE_SYSTEM_PROMPT,
-            EVALUATE_MAIN_PROMPT
+            TRANSLATE_SELF_EVAL_SYSTEM_PROMPT,
+            EVALUATE_SCHEMA,
+            EVALUATE_CANDIDATES_SCHEMA,
+            TRANSLATE_SELF_EVAL_SCHEMA
         )
-
-    translation_completion_tokens = 0
-    translation_prompt_tokens = 0
-    translation_cached_tokens = 0
-    translation_total_tokens = 0
-    translation_total_retry_attempts = 0
     
-    eval_completion_tokens = 0
-    eval_prompt_tokens = 0
-    eval_cached_tokens = 0
-    eval_total_tokens = 0
-    eval_total_retry_attempts = 0
+    # Prompts come from templates.py: static system prompt + prefix, per-item content at the tail.
+    translate_template = TRANSLATE_TEMPLATE
+    translate_no_desc_template = TRANSLATE_NO_DESC_TEMPLATE
+    translate_packed_template = TRANSLATE_PACKED_TEMPLATE
+    translate_repair_template = TRANSLATE_REPAIR_TEMPLATE
+    evaluate_template = EVALUATE_TEMPLATE
+    evaluate_packed_template = EVALUATE_PACKED_TEMPLATE
+    evaluate_candidates_template = EVALUATE_CANDIDATES_TEMPLATE
+    translate_chunk_template = TRANSLATE_CHUNK_TEMPLATE
+    translate_chunk_repair_template = TRANSLATE_CHUNK_REPAIR_TEMPLATE
+
+    translate_stage = "translate"
+    evaluate_stage = "evaluate"
     
-    def __init__(self, src_lang, dest_lang, descriptions=None, max_retries=5, eval=True):
+    def __init__(self, src_lang, dest_lang, descriptions=None, max_retries=5, eval=True, pack_size=1, pack_token_budget=2000, structured=False, self_eval=False, candidates=1, repair=False, metrics=None, stage_label=None, model=None, eval_model=None, escalate_after=1, eval_policy=None, decision_log=None):
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        # stage_label keeps several TranslateEvals on one RunMetrics apart, e.g. one per target language
+        if stage_label is not None:
+            self.translate_stage = f"translate[{stage_label}]"
+            self.evaluate_stage = f"evaluate[{stage_label}]"
         self.src_lang = src_lang
         self.dest_lang = dest_lang
         self.max_retries = max_retries
         self.eval = eval
         self.descriptions = descriptions
+        # pack_size > 1 translates (and evaluates) up to that many inputs per request
+        self.pack_size = pack_size
+        self.pack_token_budget = pack_token_budget
+        # structured=True asks the evaluator for JSON schema output instead of <<Label>> sections.
+        # self_eval=True (implies structured) returns the translation and its evaluation in one response.
+        self.self_eval = self_eval and eval
+        self.structured = structured or self.self_eval
+        self.eval_response_format = self.EVALUATE_SCHEMA if self.structured else None
+        self.candidates_eval_response_format = self.EVALUATE_CANDIDATES_SCHEMA if self.structured else None
+        # candidates > 1 samples that many translations in one call and evaluates them in one evaluator call.
+        # repair=True feeds the failed criteria of the best rejected translation into the next attempt.
+        self.candidates = candidates
+        self.repair = repair
+        # model is one model or a cascade, cheapest first: attempts move one model up the cascade every
+        # `escalate_after` failed evaluations. eval_model is the evaluator's model. None uses engine.MODEL.
+        self.models = list(model) if isinstance(model, (list, tuple)) else [model]
+        self.eval_model = eval_model
+        if escalate_after < 1:
+            raise ValueError(f"escalate_after must be at least 1, got {escalate_after}")
+        self.escalate_after = escalate_after
+        # eval_policy (e.g. policy.AdaptiveEvalPolicy) decides per input whether it gets evaluated at all.
+        # Skips, spot checks and escalations go to decision_log (policy.DecisionLog) for auditing.
+        self.eval_policy = eval_policy
+        self.decision_log = decision_log if decision_log is not None else DecisionLog()
+    
+    def _translation_system_prompt(self):
+        return self.TRANSLATE_SELF_EVAL_SYSTEM_PROMPT if self.self_eval else self.TRANSLATE_SYSTEM_PROMPT
+
+    def _translation_response_format(self):
+        return self.TRANSLATE_SELF_EVAL_SCHEMA if self.self_eval else None
+
+    def _handle_self_eval_response(self, response):
+        # (translation, eval result, parsed evaluation) of the best self-evaluated choice,
+        # (None, None, None) if none of them is usable
+        translations, evaluations = [], []
+        for response_text in response["responses"]:
+            parsed_results = _parse_json(response_text)
+            if parsed_results.get("Translation") and self._has_required_eval_tokens(parsed_results):
+                translations.append(parsed_results["Translation"])
+                evaluations.append(parsed_results)
+        return self._pick_candidate(translations, evaluations)
+
+    def _criterion_passed(self, parsed_results, key):
+        return parsed_results.get(key, '').lower().replace("\n", "").replace("-", "") == 'yes'
+
+    def _yes_count(self, parsed_results):
+        return sum(self._criterion_passed(parsed_results, key) for key in ['Accuracy', 'Clarity', 'StyleAndTone'])
+
+    def _pick_candidate(self, translations, evaluations):
+        # Best candidate by number of passed criteria; candidates without a usable evaluation come last.
+        # Returns (translation, eval result, parsed evaluation).
+        scored = [(self._yes_count(parsed_results), n) for n, parsed_results in enumerate(evaluations) if parsed_results is not None]
+        if not scored:
+            return (translations[0] if translations else None), None, None
+        _, best = max(scored)
+        return translations[best], self._score_evaluation(evaluations[best]), evaluations[best]
+
+    def _failed_criteria(self, parsed_results):
+        return ", ".join(key for key in ['Accuracy', 'Clarity', 'StyleAndTone'] if not self._criterion_passed(parsed_results, key))
+
+    def _repair_query_prompt(self, query, description, translation, evaluation, context=None):
+        # a chunk of a longer document keeps its neighbouring context, see _query_prompt
+        if context is not None:
+            return self.translate_chunk_repair_template.query_prompt(
+                SRC_LANG=self.src_lang,
+                DEST_LANG=self.dest_lang,
+                DESCRIPTION=f"Description:\n{description}\n\n" if description is not None else "",
+                BEFORE=context[0] or "(start of the document)",
+                QUERY=query,
+                AFTER=context[1] or "(end of the document)",
+                TRANSLATION=translation,
+                FAILED_CRITERIA=self._failed_criteria(evaluation)
+            )
+        return self.translate_repair_template.query_prompt(
+            SRC_LANG=self.src_lang,
+            DEST_LANG=self.dest_lang,
+            DESCRIPTION=f"Description:\n{description}\n\n" if description is not None else "",
+            QUERY=query,
+            TRANSLATION=translation,
+            FAILED_CRITERIA=self._failed_criteria(evaluation)
+        )
+
+    def _next_query_prompt(self, query_prompt, query, description, translation, evaluation, context=None):
+        # With repair on, a rejected translation and its evaluation turn the next attempt into a repair request.
+        if self.repair and translation is not None and evaluation is not None:
+            return self._repair_query_prompt(query, description, translation, evaluation, context)
+        return query_prompt
+
+    def _candidates_eval_query_prompt(self, query, translations):
+        return self.evaluate_candidates_template.query_prompt(
+            SRC_LANG=self.src_lang, DEST_LANG=self.dest_lang, QUERY=query, CANDIDATES=format_packed(translations)
+        )
+
+    def _handle_candidates_eval_response(self, response, n_candidates):
+        # candidate -> parsed evaluation (None where the section is missing or malformed)
+        self._record_eval_usage(response)
+        if response is None:
+            self._record_eval_retry()
+            return [None] * n_candidates
+        
+        parsed_items = self._parse_candidates_evaluation(response["response"])
+        evaluations = []
+        for n in range(1, n_candidates + 1):
+            parsed_results = parsed_items.get(n, {})
+            if self._has_required_eval_tokens(parsed_results):
+                evaluations.append(parsed_results)
+            else:
+                self._record_eval_retry()
+                evaluations.append(None)
+        return evaluations
+
+    def _parse_candidates_evaluation(self, response_text):
+        # candidate number -> parsed evaluation, from EVALUATE_CANDIDATES_SCHEMA JSON or [[ITEM n]] sections
+        if not self.structured:
+            return self._parse_packed_evaluation(response_text)
+        candidates = _parse_json(response_text).get("Candidates")
+        if not isinstance(candidates, list):
+            return {}
+        return {candidate["Item"]: candidate for candidate in candidates if isinstance(candidate, dict) and "Item" in candidate}
+
+    def _evaluate_candidates_calls(self, query, translations):
+        # One evaluator call for all candidates, returns (translation, eval result, parsed evaluation) of the best.
+        # Like every *_calls method this is a generator of llm() calls, see _run_calls.
+        if len(translations) == 1:
+            eval_result, parsed_results = yield from self._evaluate_calls(query, translations[0])
+            return translations[0], eval_result, parsed_results
         
-        if self.descriptions is not None: 
-            self.TRANSLATE_MAIN_PROMPT = self.TRANSLATE_MAIN_PROMPT
+        response = yield dict(system_prompt=self.EVALUATE_SYSTEM_PROMPT, query_prompt=self._candidates_eval_query_prompt(query, translations), response_format=self.candidates_eval_response_format, model=self.eval_model)
+        return self._pick_candidate(translations, self._handle_candidates_eval_response(response, len(translations)))
+
+    def _query_prompt(self, src_lang, dest_lang, query, description, context=None):
+        # context: (text before, text after) for a chunk of a longer document, see chunking.py
+        if context is not None:
+            return self.translate_chunk_template.query_prompt(
+                SRC_LANG = src_lang,
+                DEST_LANG = dest_lang,
+                DESCRIPTION = f"Description:\n{description}\n\n" if description is not None else "",
+                BEFORE = context[0] or "(start of the document)",
+                QUERY = query,
+                AFTER = context[1] or "(end of the document)"
+            )
+        if description is not None:
+            return self.translate_template.query_prompt(SRC_LANG = src_lang, DEST_LANG = dest_lang, QUERY = query, DESCRIPTION = description)
         else:
-            self.TRANSLATE_MAIN_PROMPT = self.TRANSLATE_MAIN_NO_DESC_PROMPT
-    
-    def _translate(self, src_lang, dest_lang, query, description):
-        if self.descriptions is not None:
-            query_prompt = self.TRANSLATE_MAIN_PROMPT.format(SRC_LANG = src_lang, DEST_LANG = dest_lang, QUERY = query, DESCRIPTION = description)
+            return self.translate_no_desc_template.query_prompt(SRC_LANG = src_lang, DEST_LANG = dest_lang, QUERY = query)
+
+    def _record_translation_usage(self, response):
+        # response is None for a failed call
+        self.metrics.record_call(self.translate_stage, response)
+
+    def _record_eval_usage(self, response):
+        self.metrics.record_call(self.evaluate_stage, response)
+
+    def _record_translation_retry(self):
+        self.metrics.record_retry(self.translate_stage)
+
+    def _record_eval_retry(self):
+        self.metrics.record_retry(self.evaluate_stage)
+
+    def _handle_translation_response(self, response, attempt):
+        # False when the API call itself failed and the attempt has to be retried.
+        self._record_translation_usage(response)
+        if response is None:
+            self._record_translation_retry()
+            print(f"Attempt {attempt + 1}/{self.max_retries} | failed: API error, retrying...")
+            return False
+        return True
+
+    def _should_evaluate(self, query):
+        if not self.eval:
+            return False
+        if self.eval_policy is None:
+            return True
+        evaluate, reason, input_class = self.eval_policy.decide(query, self.dest_lang)
+        self.decision_log.record(
+            "evaluate" if evaluate else "skip_evaluation", query,
+            stage=self.evaluate_stage, reason=reason, input_class=input_class
+        )
+        return evaluate
+
+    def _record_eval_outcome(self, query, eval_result):
+        # the policy learns from first evaluations only, retries would skew the pass rate
+        if self.eval_policy is not None and eval_result is not None:
+            self.eval_policy.record(query, eval_result == "Translation Passed", self.dest_lang)
+
+    def _translation_tier(self, query, failed_evals, tier):
+        # index into self.models for the next attempt
+        next_tier = min(failed_evals // self.escalate_after, len(self.models) - 1)
+        if next_tier != tier:
+            self.decision_log.record(
+                "escalate", query, stage=self.translate_stage, failed_evaluations=failed_evals,
+                from_model=self.models[tier] or MODEL, model=self.models[next_tier] or MODEL
+            )
+        return next_tier
+
+    def _handle_eval_result(self, eval_result, attempt):
+        if eval_result == "Translation Passed":
+            return True
         else:
-            query_prompt = self.TRANSLATE_MAIN_PROMPT.format(SRC_LANG = src_lang, DEST_LANG = dest_lang, QUERY = query)
+            self._record_translation_retry()
+            print(f"Attempt {attempt + 1}/{self.max_retries} | failed: Bad translation, retrying...")
+            return False
+
+    def _translate(self, src_lang, dest_lang, query, description, context=None, evaluate=None, failed_evals=0):
+        # Returns (translation, evaluated): evaluated is False when eval is off or the evaluation policy
+        # skipped the item, so its translation was never checked. translation is None if every attempt failed.
+        # evaluate: the evaluation policy's decision when the caller already made it (a packed item
+        # retried on its own), so every item is decided, and audited, once.
+        # failed_evals: evaluations the item already failed (in its pack); they count towards escalation,
+        # and the policy isn't told about the item's first evaluation a second time.
+        return _run_calls(self._translate_calls(src_lang, dest_lang, query, description, context, evaluate, failed_evals))
+
+    def _translate_calls(self, src_lang, dest_lang, query, description, context=None, evaluate=None, failed_evals=0):
+        # The attempt loop behind _translate and AsyncTranslateEval._atranslate, as a generator of llm() calls
+        query_prompt = self._query_prompt(src_lang, dest_lang, query, description, context)
+        if evaluate is None:
+            evaluate = self._should_evaluate(query)
             
-        if self.eval:
+        if evaluate:
+            attempt_prompt = query_prompt
+            tier = 0
             for attempt in range(self.max_retries):
-                response = llm(
-                                    system_prompt=self.TRANSLATE_SYSTEM_PROMPT, 
-                                    query_prompt=query_prompt
+                tier = self._translation_tier(query, failed_evals, tier)
+                # re-translations bypass the cache, otherwise they'd get the failed translation back
+                response = yield dict(
+                                    system_prompt=self._translation_system_prompt(), 
+                                    query_prompt=attempt_prompt,
+                                    bypass_cache=attempt > 0,
+                                    response_format=self._translation_response_format(),
+                                    n=self.candidates,
+                                    model=self.models[tier]
                                 )
+                if not self._handle_translation_response(response, attempt):
+                    continue
                 
-                self.translation_completion_tokens += response["used_completion_tokens"]
-                self.translation_prompt_tokens += response["used_prompt_tokens"]
-                self.translation_cached_tokens += response["cached_prompt_tokens"]
-                self.translation_total_tokens += response["total_used_tokens"]
-                
-                response_text = response["response"]
-                eval_result = self._evaluate(query, response_text)
-                
-                if eval_result == "Translation Passed":
-                    return response_text
+                if self.self_eval:
+                    response_text, eval_result, evaluation = self._handle_self_eval_response(response)
                 else:
-                    self.translation_total_retry_attempts += 1
-                    print(f"Attempt {attempt + 1}/{self.max_retries} | failed: Bad translation, retrying...")
+                    response_text, eval_result, evaluation = yield from self._evaluate_candidates_calls(query, response["responses"])
+                
+                if failed_evals == 0:
+                    self._record_eval_outcome(query, eval_result)
+                if self._handle_eval_result(eval_result, attempt):
+                    return response_text, True
+                failed_evals += 1
+                attempt_prompt = self._next_query_prompt(query_prompt, query, description, response_text, evaluation, context)
+            return None, True
                     
         else:
-            response = llm(
-                            system_prompt=self.TRANSLATE_SYSTEM_PROMPT, 
-                            query_prompt=query_prompt
-                        )
-            
-            self.translation_completion_tokens += response["used_completion_tokens"]
-            self.translation_prompt_tokens += response["used_prompt_tokens"]
-            self.translation_cached_tokens += response["cached_prompt_tokens"]
-            self.translation_total_tokens += response["total_used_tokens"]
-            
-            return response["response"]
+            for attempt in range(self.max_retries):
+                response = yield dict(
+                                system_prompt=self.TRANSLATE_SYSTEM_PROMPT, 
+                                query_prompt=query_prompt,
+                                model=self.models[0]
+                            )
+                if self._handle_translation_response(response, attempt):
+                    return response["response"], False
+            return None, False
+
+    def _eval_query_prompt(self, query, translation):
+        return self.evaluate_template.query_prompt(SRC_LANG=self.src_lang, DEST_LANG=self.dest_lang, QUERY=query, TRANSLATION=translation)
+
+    def _handle_eval_response(self, response, attempt):
+        # Returns the scored evaluation, or None when this attempt has to be retried.
+        parsed_results = self._checked_evaluation(response, attempt)
+        return self._score_evaluation(parsed_results) if parsed_results is not None else None
+
+    def _checked_evaluation(self, response, attempt):
+        # Returns the parsed evaluation, or None when this attempt has to be retried.
+        self._record_eval_usage(response)
+        if response is None:
+            self._record_eval_retry()
+            print(f"Attempt {attempt + 1}/{self.max_retries} | failed: API error, retrying...")
+            return None
+        
+        response_text = response["response"]
+        parsed_results = _parse_json(response_text) if self.structured else self._parse_evaluation(response_text)
+        
+        if self._has_required_eval_tokens(parsed_results):
+            return parsed_results
+        else:
+            self._record_eval_retry()
+            print(f"Attempt {attempt + 1}/{self.max_retries} | failed: Missing tokens, retrying...")
+            return None
     
-    def _evaluate(self, query, translation):
+    def _evaluate_calls(self, query, translation):
+        # (eval result, parsed evaluation), (None, None) if no attempt produced all tokens
         for attempt in range(self.max_retries):
-            response = llm(
+            response = yield dict(
                             system_prompt=self.EVALUATE_SYSTEM_PROMPT, 
-                            query_prompt=self.EVALUATE_MAIN_PROMPT.format(SRC_LANG=self.src_lang, DEST_LANG=self.dest_lang, QUERY=query, TRANSLATION=translation)
+                            query_prompt=self._eval_query_prompt(query, translation),
+                            bypass_cache=attempt > 0,
+                            response_format=self.eval_response_format,
+                            model=self.eval_model
                         )
-            self.eval_completion_tokens += response["used_completion_tokens"]
-            self.eval_prompt_tokens += response["used_prompt_tokens"]
-            self.eval_cached_tokens += response["cached_prompt_tokens"]
-            self.eval_total_tokens += response["total_used_tokens"]
-            
-            response_text = response["response"]
-            parsed_results = self._parse_evaluation(response_text)
-            
-            if self._has_required_eval_tokens(parsed_results):
-                return self._score_evaluation(parsed_results)
-            else:
-                self.eval_total_retry_attempts += 1
-                print(f"Attempt {attempt + 1}/{self.max_retries} | failed: Missing tokens, retrying...")
+            parsed_results = self._checked_evaluation(response, attempt)
+            if parsed_results is not None:
+                return self._score_evaluation(parsed_results), parsed_results
+        return None, None
     
     def _has_required_eval_tokens(self, parsed_results):
         required_tokens = ["Accuracy", "Clarity", "StyleAndTone"]
@@ -208,6 +824,10 @@ class TranslateEval:
         
         return parsed_results
 
+    def _parse_packed_evaluation(self, response):
+        # item number -> parsed evaluation, for a response to the packed evaluate prompt
+        return {n: self._parse_evaluation(section) for n, section in split_packed(response).items()}
+
     def _score_evaluation(self, parsed_results):
         score = 0
         for key in ['Accuracy', 'Clarity', 'StyleAndTone']:
@@ -220,30 +840,211 @@ class TranslateEval:
         
     def _stringify_description(self, description):
         return f"Style: {description['Style']}\nTone: {description['Tone']}\nNuances: {description['Nuances']}\nIntent: {description['Intent']}\nCultural Meaning: {description['CulturalMeaning']}\nSymbolism: {description['Symbolism']}"
+
+    def _description_for(self, idx):
+        # an item whose description failed is translated without one
+        if self.descriptions is not None and self.descriptions["results"][idx] is not None:
+            return self._stringify_description(self.descriptions["results"][idx])
+        return None
+
+    def _translate_item(self, query, description):
+        # Single-item entry point for streaming, returns (translation, evaluated). `description` is a
+        # parsed analysis or None, an item whose description failed is translated without one.
+        if description is not None:
+            description = self._stringify_description(description)
+        return self._translate(self.src_lang, self.dest_lang, query, description)
+    
+    def counters(self):
+        return {stage: self.metrics.counters(stage) for stage in (self.translate_stage, self.evaluate_stage)}
+    
+    def _packed_translation_section(self, query, description):
+        if description is not None:
+            return f"Description:\n{description}\n\nText:\n{query}"
+        return query
+
+    def _evaluate_packed(self, queries, translations):
+        # translations: idx -> text. One evaluator call for all of them, returns idx -> eval result
+        # (None for items whose section is missing or malformed).
+        group = list(translations)
+        response = llm(
+            system_prompt=self.EVALUATE_SYSTEM_PROMPT,
+            query_prompt=self.evaluate_packed_template.query_prompt(
+                SRC_LANG=self.src_lang,
+                DEST_LANG=self.dest_lang,
+                QUERIES=format_packed([f"Query:\n{queries[idx]}\n\nTranslation:\n{translations[idx]}" for idx in group])
+            ),
+            model=self.eval_model
+        )
+        self._record_eval_usage(response)
+        parsed_items = {}
+        if response is not None:
+            parsed_items = self._parse_packed_evaluation(response["response"])
+        
+        eval_results = {}
+        for n, idx in enumerate(group, start=1):
+            parsed_results = parsed_items.get(n, {})
+            if self._has_required_eval_tokens(parsed_results):
+                eval_results[idx] = self._score_evaluation(parsed_results)
+            else:
+                self._record_eval_retry()
+                eval_results[idx] = None
+        return eval_results
+
+    def _translate_packed(self, queries, group):
+        # One translation request (and one evaluation request) for the whole group. Items whose section
+        # is missing, malformed or fails evaluation are unpacked and go through _translate on their own.
+        # Returns idx -> (translation, evaluated).
+        response = llm(
+            system_prompt=self.TRANSLATE_SYSTEM_PROMPT,
+            query_prompt=self.translate_packed_template.query_prompt(
+                SRC_LANG=self.src_lang,
+                DEST_LANG=self.dest_lang,
+                QUERIES=format_packed([self._packed_translation_section(queries[idx], self._description_for(idx)) for idx in group])
+            ),
+            model=self.models[0]
+        )
+        self._record_translation_usage(response)
+        sections = {}
+        if response is not None:
+            sections = split_packed(response["response"])
+        
+        translations = {idx: sections[n] for n, idx in enumerate(group, start=1) if sections.get(n)}
+        evaluate = {idx: self._should_evaluate(queries[idx]) for idx in group}
+        checked = {idx: text for idx, text in translations.items() if evaluate[idx]}
+        failed_evals = {}
+        if checked:
+            eval_results = self._evaluate_packed(queries, checked)
+            for idx, eval_result in eval_results.items():
+                if eval_result is None:
+                    # only the evaluation section is missing or malformed, the translation is kept and evaluated on its own
+                    eval_result, _ = _run_calls(self._evaluate_calls(queries[idx], translations[idx]))
+                self._record_eval_outcome(queries[idx], eval_result)
+                if eval_result != "Translation Passed":
+                    del translations[idx]
+                if eval_result == "Translation Failed":
+                    failed_evals[idx] = 1
+        
+        results = {}
+        for n, idx in enumerate(group, start=1):
+            if idx in translations:
+                results[idx] = (translations[idx], evaluate[idx])
+            else:
+                self._record_translation_retry()
+                print(f"Packed item {n}/{len(group)} | failed: Missing or bad translation, retrying on its own...")
+                results[idx] = self._translate(self.src_lang, self.dest_lang, queries[idx], self._description_for(idx), evaluate=evaluate[idx], failed_evals=failed_evals.get(idx, 0))
+        return results
     
-    def translate(self, queries: list) -> dict:
-        results = []
+    def translate(self, queries: list, done=None, on_result=None) -> dict:
+        # done: idx -> already known translation (e.g. from a resume journal), those items are skipped.
+        # on_result(idx, translation, evaluated) is called after each newly translated item.
+        results = [None] * len(queries)
+        evaluated = [None] * len(queries) # None for items taken from `done`
+        pending = []
         
-        for idx, query in enumerate(queries):
-            if self.descriptions is not None:
-                description = self._stringify_description(self.descriptions["results"][idx])
+        for idx in range(len(queries)):
+            if done is not None and idx in done:
+                results[idx] = done[idx]
             else:
-                description = None
-                
-            results.append(self._translate(self.src_lang, self.dest_lang, query, description))
+                pending.append(idx)
+        
+        pack_size = 1 if self.structured else self.pack_size
+        # the budget counts each item's whole packed section, description included
+        sections = [self._packed_translation_section(query, self._description_for(idx)) for idx, query in enumerate(queries)] if pack_size > 1 else queries
+        for group in pack(sections, pending, pack_size, self.pack_token_budget):
+            if len(group) == 1:
+                idx = group[0]
+                group_results = {idx: self._translate(self.src_lang, self.dest_lang, queries[idx], self._description_for(idx))}
+            else:
+                group_results = self._translate_packed(queries, group)
+            
+            for idx in group:
+                results[idx], evaluated[idx] = group_results[idx]
+                if on_result is not None:
+                    on_result(idx, results[idx], evaluated[idx])
         
+        return self._summary(results, len(queries), evaluated)
+
+    def _summary(self, results, n, evaluated=None):
+        # evaluated[i]: whether results[i] went through evaluation (None when unknown)
+        translation = self.metrics.counters(self.translate_stage)
+        evaluation = self.metrics.counters(self.evaluate_stage)
         return {
             "results": results,
-            "translation_completion_tokens": self.translation_completion_tokens,
-            "translation_prompt_tokens": self.translation_prompt_tokens,
-            "translation_cached_tokens": self.translation_cached_tokens,
-            "translation_total_tokens": self.translation_total_tokens,
-            "translation_total_retry_attempts": self.translation_total_retry_attempts,
-            "average_translation_retry_attempts": self.translation_total_retry_attempts / len(queries),
-            "evaluation_completion_tokens": self.eval_completion_tokens,
-            "evaluation_prompt_tokens": self.eval_prompt_tokens,
-            "evaluation_cached_tokens": self.eval_cached_tokens,
-            "evaluation_total_tokens": self.eval_total_tokens,
-            "evaluation_total_retry_attempts": self.eval_total_retry_attempts,
-            "average_evaluation_retry_attempts": self.eval_total_retry_attempts / len(queries)
-        }
\ No newline at end of file
+            "evaluated": evaluated if evaluated is not None else [None] * n,
+            "translation_completion_tokens": translation["completion_tokens"],
+            "translation_prompt_tokens": translation["prompt_tokens"],
+            "translation_cached_tokens": translation["cached_tokens"],
+            "translation_total_tokens": translation["total_tokens"],
+            "translation_total_retry_attempts": translation["retries"],
+            "average_translation_retry_attempts": translation["retries"] / n if n else 0.0,
+            "evaluation_completion_tokens": evaluation["completion_tokens"],
+            "evaluation_prompt_tokens": evaluation["prompt_tokens"],
+            "evaluation_cached_tokens": evaluation["cached_tokens"],
+            "evaluation_total_tokens": evaluation["total_tokens"],
+            "evaluation_total_retry_attempts": evaluation["retries"],
+            "average_evaluation_retry_attempts": evaluation["retries"] / n if n else 0.0,
+            "translation_cache_hits": translation["cache_hits"],
+            "translation_cache_misses": translation["cache_misses"],
+            "evaluation_cache_hits": evaluation["cache_hits"],
+            "evaluation_cache_misses": evaluation["cache_misses"]
+        }
+
+class AsyncDescribe(Describe):
+    # Same describe task as Describe, but with up to `max_concurrency` requests in flight.
+    def __init__(self, max_retries=5, src_lang="English", max_concurrency=16, **kwargs):
+        super().__init__(max_retries=max_retries, src_lang=src_lang, **kwargs)
+        self.max_concurrency = max_concurrency
+
+    async def _aget_structured_response(self, prompt):
+        for attempt in range(self.max_retries):
+            response = await allm(system_prompt=self.DESCRIBE_SYSTEM_PROMPT, query_prompt=self._query_prompt(prompt), bypass_cache=attempt > 0, response_format=self.response_format, model=self.model)
+            parsed_results = self._handle_response(response, attempt)
+            if parsed_results is not None:
+                return parsed_results
+
+        return None
+
+    async def adescribe(self, prompts: list) -> dict:
+        results = await _gather_bounded(
+            lambda idx, prompt: self._aget_structured_response(prompt), prompts, self.max_concurrency
+        )
+        return self._summary(list(results), len(prompts))
+
+class AsyncTranslateEval(TranslateEval):
+    # Same translate/evaluate task as TranslateEval, but with up to `max_concurrency` items in flight.
+    def __init__(self, src_lang, dest_lang, descriptions=None, max_retries=5, eval=True, max_concurrency=16, **kwargs):
+        super().__init__(src_lang, dest_lang, descriptions=descriptions, max_retries=max_retries, eval=eval, **kwargs)
+        self.max_concurrency = max_concurrency
+
+    async def _atranslate(self, src_lang, dest_lang, query, description, context=None, evaluate=None):
+        # Same attempts as TranslateEval._translate, with the calls awaited
+        return await _arun_calls(self._translate_calls(src_lang, dest_lang, query, description, context, evaluate))
+
+    async def _atranslate_item(self, query, description):
+        if description is not None:
+            description = self._stringify_description(description)
+        return await self._atranslate(self.src_lang, self.dest_lang, query, description)
+
+    async def atranslate(self, queries: list) -> dict:
+        results = await _gather_bounded(
+            lambda idx, query: self._atranslate(self.src_lang, self.dest_lang, query, self._description_for(idx)),
+            queries,
+            self.max_concurrency
+        )
+        return self._summary([translation for translation, _ in results], len(queries), [evaluated for _, evaluated in results])
+
+    async def atranslate_chunks(self, chunks: list, description=None, context_chars=200, done=None) -> dict:
+        # Chunks of one document (see chunking.split_document), translated and evaluated concurrently.
+        # Every chunk gets the shared document description plus up to `context_chars` of its neighbours,
+        # and retries on its own, so one failed evaluation doesn't redo the whole document.
+        # done: idx -> translation of chunks that already passed, those are kept as they are.
+        if description is not None:
+            description = self._stringify_description(description)
+        
+        async def translate_chunk(idx, chunk):
+            if done is not None and done.get(idx) is not None:
+                return done[idx], None
+            return await self._atranslate(self.src_lang, self.dest_lang, chunk, description, neighbour_context(chunks, idx, context_chars))
+        
+        results = await _gather_bounded(translate_chunk, chunks, self.max_concurrency)
+        return self._summary([translation for translation, _ in results], len(chunks), [evaluated for _, evaluated in results])
@@ -0,0 +1,80 @@
+import os
+import json
+import hashlib
+
+class Journal:
+    # Append-only JSONL journal of finished work, used by Artinya.pipe(resume=...).
+    # Every line is one stage outcome for one item: {"stage", "index", "hash", ..., "tokens"}.
+    # Items are keyed by index plus a hash of (src_lang, dest_lang, text), so a changed input or
+    # language pair is treated as unfinished. The last write wins when an item appears twice.
+    def __init__(self, path, src_lang, dest_lang, fsync=True):
+        self.path = path
+        self.src_lang = src_lang
+        self.dest_lang = dest_lang
+        self.fsync = fsync
+        self.entries = {"describe": {}, "translate": {}}
+        self.tokens = {"describe": None, "translate": None}
+
+        self._load()
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # torn last line from a crash mid-write
+                self.entries[record["stage"]][record["index"]] = record
+                self.tokens[record["stage"]] = record["tokens"]
+
+    def content_hash(self, text):
+        return hashlib.sha256(f"{self.src_lang}\0{self.dest_lang}\0{text}".encode("utf-8")).hexdigest()
+
+    def _append(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def record_description(self, idx, text, description, tokens):
+        self._append({
+            "stage": "describe",
+            "index": idx,
+            "hash": self.content_hash(text),
+            "status": "done" if description is not None else "failed",
+            "description": description,
+            "tokens": tokens
+        })
+
+    def record_translation(self, idx, text, translation, evaluation, tokens):
+        self._append({
+            "stage": "translate",
+            "index": idx,
+            "hash": self.content_hash(text),
+            "status": "done" if translation is not None else "failed",
+            "translation": translation,
+            "evaluation": evaluation,
+            "tokens": tokens
+        })
+
+    def completed(self, stage, prompts):
+        # idx -> journaled result for items of `prompts` that finished this stage successfully
+        key = "description" if stage == "describe" else "translation"
+        done = {}
+        for idx, text in enumerate(prompts):
+            record = self.entries[stage].get(idx)
+            if record is not None and record["status"] == "done" and record["hash"] == self.content_hash(text):
+                done[idx] = record[key]
+        return done
+
+    def restore_tokens(self, stage, worker):
+        # Puts the last journaled counters back into a Describe/TranslateEval's metrics so totals span the resumed run.
+        if self.tokens[stage] is not None:
+            worker.metrics.restore(self.tokens[stage])
+
+    def close(self):
+        self.file.close()
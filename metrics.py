@@ -0,0 +1,253 @@
+import json
+import math
+import random
+import threading
+from collections import Counter
+from templates import cache_report
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style (cumulative, last one is +Inf)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+MAX_LATENCY_SAMPLES = 10_000
+
+# backoffs: 429s and transient API errors retried inside the rate limiter, retries: attempts the stage redid
+COUNTER_NAMES = (
+    "calls", "failures", "retries", "backoffs", "cache_hits", "cache_misses",
+    "prompt_tokens", "completion_tokens", "cached_tokens", "total_tokens"
+)
+
+class LatencyHistogram:
+    # Bucket counts for export plus a bounded reservoir sample for percentiles, so memory stays
+    # constant however long the run is.
+    def __init__(self, buckets=LATENCY_BUCKETS, max_samples=MAX_LATENCY_SAMPLES, seed=0):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max_samples = max_samples
+        self.samples = []
+        self._rng = random.Random(seed)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for n, upper in enumerate(self.buckets):
+            if seconds <= upper:
+                self.bucket_counts[n] += 1
+                break
+
+        if len(self.samples) < self.max_samples:
+            self.samples.append(seconds)
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < self.max_samples:
+                self.samples[slot] = seconds
+
+    def percentile(self, q):
+        # nearest-rank percentile of the sampled latencies, None before the first observation
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+    def cumulative_counts(self):
+        counts, total = [], 0
+        for count in self.bucket_counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": {_format_bound(upper): count for upper, count in zip(self.buckets, self.cumulative_counts())}
+        }
+
+def _format_bound(upper):
+    return "+Inf" if upper == math.inf else repr(float(upper))
+
+class StageMetrics:
+    # Counters and call latencies of one stage (describe, translate, evaluate, ...).
+    def __init__(self):
+        for name in COUNTER_NAMES:
+            setattr(self, name, 0)
+        self.latency = LatencyHistogram()
+        self.models = Counter() # calls per model, to see how often a cascade escalated
+        self.model_cached_tokens = Counter() # cached prompt tokens per model, priced per model in report()
+
+    def counters(self):
+        return {name: getattr(self, name) for name in COUNTER_NAMES}
+
+class RunMetrics:
+    # Per-run metrics that the stages record into. One instance is shared by every stage of a run
+    # (and by all threads / tasks working on it); each pipeline run gets its own, so two runs in one
+    # process never mix their numbers. Export with to_json() / to_prometheus(), print with report().
+    # A child created with parent=run_metrics also records into the parent, e.g. to get per-row numbers
+    # while the run totals keep adding up.
+    def __init__(self, parent=None):
+        self.stages = {}
+        self.parent = parent
+        self._lock = threading.Lock()
+
+    def _stage(self, stage):
+        if stage not in self.stages:
+            self.stages[stage] = StageMetrics()
+        return self.stages[stage]
+
+    def record_call(self, stage, response):
+        # One llm()/allm() result. None means the call failed, a cache hit costs no call and no tokens.
+        with self._lock:
+            self._record_call(self._stage(stage), response)
+        if self.parent is not None:
+            self.parent.record_call(stage, response)
+
+    def _record_call(self, metrics, response):
+        if response is None:
+            metrics.calls += 1
+            metrics.failures += 1
+            return
+        if response["cache_hit"]:
+            metrics.cache_hits += 1
+            return
+
+        metrics.calls += 1
+        metrics.cache_misses += 1
+        metrics.backoffs += response.get("backoffs", 0)
+        metrics.prompt_tokens += response["used_prompt_tokens"]
+        metrics.completion_tokens += response["used_completion_tokens"]
+        metrics.cached_tokens += response["cached_prompt_tokens"]
+        metrics.total_tokens += response["total_used_tokens"]
+        if response.get("model") is not None:
+            metrics.models[response["model"]] += 1
+            metrics.model_cached_tokens[response["model"]] += response["cached_prompt_tokens"]
+        if response.get("latency") is not None:
+            metrics.latency.observe(response["latency"])
+
+    def record_retry(self, stage):
+        with self._lock:
+            self._stage(stage).retries += 1
+        if self.parent is not None:
+            self.parent.record_retry(stage)
+
+    def total(self, name):
+        # counter summed over all stages
+        with self._lock:
+            return sum(getattr(metrics, name) for metrics in self.stages.values())
+
+    def get(self, stage, name):
+        with self._lock:
+            return getattr(self._stage(stage), name)
+
+    def counters(self, stage):
+        with self._lock:
+            return self._stage(stage).counters()
+
+    def restore(self, counters):
+        # counters: stage -> {counter name: value}, e.g. from a resume journal
+        with self._lock:
+            for stage, values in counters.items():
+                if not isinstance(values, dict):
+                    continue # journal written before per-stage counters
+                metrics = self._stage(stage)
+                for name, value in values.items():
+                    if name in COUNTER_NAMES:
+                        setattr(metrics, name, value)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                stage: {
+                    **metrics.counters(),
+                    "models": dict(metrics.models),
+                    "model_cached_tokens": dict(metrics.model_cached_tokens),
+                    "latency": metrics.latency.to_dict()
+                }
+                for stage, metrics in self.stages.items()
+            }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix="artinya"):
+        # Prometheus text exposition format, one series per stage (label `stage`).
+        data = self.to_dict()
+        lines = []
+        for name in COUNTER_NAMES:
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for stage, values in data.items():
+                lines.append(f'{prefix}_{name}_total{{stage="{stage}"}} {values[name]}')
+
+        lines.append(f"# TYPE {prefix}_model_calls_total counter")
+        for stage, values in data.items():
+            for model, count in values["models"].items():
+                lines.append(f'{prefix}_model_calls_total{{stage="{stage}",model="{model}"}} {count}')
+
+        lines.append(f"# TYPE {prefix}_call_latency_seconds histogram")
+        for stage, values in data.items():
+            latency = values["latency"]
+            for upper, count in latency["buckets"].items():
+                lines.append(f'{prefix}_call_latency_seconds_bucket{{stage="{stage}",le="{upper}"}} {count}')
+            lines.append(f'{prefix}_call_latency_seconds_sum{{stage="{stage}"}} {latency["sum"]}')
+            lines.append(f'{prefix}_call_latency_seconds_count{{stage="{stage}"}} {latency["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def report(self, model="gpt-4o-mini", show_cache=True):
+        # Plain-text table with one column per stage. Cache savings are priced with the model that served
+        # each call, `model` only prices tokens without one (e.g. counters restored from a resume journal).
+        data = self.to_dict()
+        stages = list(data)
+        rows = [
+            ("Calls", lambda values: values["calls"]),
+            ("Failures", lambda values: values["failures"]),
+            ("Retries", lambda values: values["retries"]),
+            ("Backoffs (429/5xx)", lambda values: values["backoffs"]),
+            ("Prompt Tokens", lambda values: values["prompt_tokens"]),
+            ("Completion Tokens", lambda values: values["completion_tokens"]),
+            ("Cached Tokens", lambda values: values["cached_tokens"]),
+            ("Total Tokens", lambda values: values["total_tokens"]),
+            ("Prompt Cache Hit Ratio", lambda values: f"{cache_report(values['prompt_tokens'], values['cached_tokens'], model)['hit_ratio']:.2%}"),
+            ("Est. Cache Savings (USD)", lambda values: f"{_cache_savings(values, model):.4f}"),
+        ]
+        if any(len(data[stage]["models"]) > 1 for stage in stages):
+            rows.append(("Calls by Model", lambda values: ", ".join(f"{model}: {count}" for model, count in values["models"].items())))
+        if show_cache:
+            rows += [
+                ("Cache Hits", lambda values: values["cache_hits"]),
+                ("Cache Misses", lambda values: values["cache_misses"]),
+            ]
+        rows += [
+            (f"Latency p{q} (s)", lambda values, q=q: _format_seconds(values["latency"][f"p{q}"]))
+            for q in (50, 95, 99)
+        ]
+
+        return format_table(
+            ["Metric"] + [stage[:1].upper() + stage[1:] for stage in stages],
+            [[label] + [value(data[stage]) for stage in stages] for label, value in rows]
+        )
+
+def _cache_savings(values, default_model):
+    cached_tokens = dict(values["model_cached_tokens"])
+    unattributed = values["cached_tokens"] - sum(cached_tokens.values())
+    if unattributed:
+        cached_tokens[default_model] = cached_tokens.get(default_model, 0) + unattributed
+    return sum(cache_report(values["prompt_tokens"], tokens, model)["estimated_savings"] for model, tokens in cached_tokens.items())
+
+def format_table(headers, rows):
+    # Grid table like tabulate's "grid" format, without the dependency.
+    table = [[str(cell) for cell in headers]] + [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(row[column]) for row in table) for column in range(len(headers))]
+
+    separator = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+    lines = [separator]
+    for n, row in enumerate(table):
+        lines.append("| " + " | ".join(cell.ljust(width) for cell, width in zip(row, widths)) + " |")
+        if n == 0:
+            lines.append(separator.replace("-", "="))
+    lines.append(separator)
+    return "\n".join(lines)
+
+def _format_seconds(seconds):
+    return "-" if seconds is None else f"{seconds:.3f}"
@@ -0,0 +1,308 @@
+import re
+import json
+import time
+import random
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from packing import estimate_tokens
+from prompts import TRANSLATE_SYSTEM_PROMPT, TRANSLATE_SELF_EVAL_SYSTEM_PROMPT, EVALUATE_SYSTEM_PROMPT
+
+ITEM_MARKER = r'\[\[ITEM (\d+)\]\]'
+FILE_CONTENT_PATH = r'/files/([^/]+)/content$'
+BATCH_PATH = r'/batches/([^/]+)$'
+DESCRIBE_FIELDS = ["Style", "Tone", "Nuances", "Intent", "CulturalMeaning", "Symbolism"]
+EVAL_FIELDS = ["Accuracy", "Clarity", "StyleAndTone"]
+
+def _multipart(content_type, body):
+    # field name -> (filename, bytes) of a multipart/form-data body, e.g. a files.create upload
+    message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body)
+    return {
+        part.get_param("name", header="content-disposition"): (part.get_filename(), part.get_payload(decode=True))
+        for part in message.iter_parts()
+    }
+
+class MockServer:
+    # Local stand-in for the chat completions endpoint, for benchmarks that shouldn't cost money or
+    # depend on the network. It recognises describe / translate / evaluate requests (packed, structured,
+    # self-evaluated and n > 1 too) and answers in the format the stages parse.
+    # It also serves the files and batches endpoints batch.BatchRunner uses: uploaded request files are
+    # kept in memory and a batch answers every line through the same chat completions mock (errors and
+    # rate limits become failed lines) on a background thread, so batch jobs can be polled like real ones.
+    #   latency, jitter: seconds slept per request (latency + uniform(0, jitter))
+    #   malformed_rate: chance an answer (or packed section) misses a required token / is invalid JSON
+    #   no_rate: chance an evaluation says "no" to enough criteria to fail the translation
+    #   error_rate, rate_limit_rate: chance of a 500 / a 429 with Retry-After: retry_after
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, jitter=0.0, malformed_rate=0.0, no_rate=0.0,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=0.1, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.malformed_rate = malformed_rate
+        self.no_rate = no_rate
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.requests = {"describe": 0, "translate": 0, "evaluate": 0, "errors": 0, "batches": 0}
+        self.files = {} # file id -> (filename, purpose, bytes)
+        self.batches = {} # batch id -> batch object
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 256 # a burst of concurrent clients shouldn't wait on the listen backlog
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _chance(self, rate):
+        with self._lock:
+            return self._rng.random() < rate
+
+    def _count(self, kind):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def _kind(self, system_prompt):
+        if system_prompt in (TRANSLATE_SYSTEM_PROMPT, TRANSLATE_SELF_EVAL_SYSTEM_PROMPT):
+            return "translate"
+        if system_prompt == EVALUATE_SYSTEM_PROMPT:
+            return "evaluate"
+        return "describe"
+
+    def _labels(self, fields, values):
+        # <<Label>>: value sections; a malformed answer loses its last label
+        if self._chance(self.malformed_rate):
+            fields = fields[:-1]
+        return "\n".join(f"<<{field}>>: {values[field]}" for field in fields)
+
+    def _json(self, values):
+        text = json.dumps(values)
+        return text[:len(text) // 2] if self._chance(self.malformed_rate) else text
+
+    def _evaluation(self):
+        failed = self._chance(self.no_rate)
+        return {"Accuracy": "no" if failed else "yes", "Clarity": "no" if failed else "yes", "StyleAndTone": "yes"}
+
+    def _section(self, kind, schema, n):
+        if kind == "describe":
+            values = {field: f"{field.lower()} of the text" for field in DESCRIBE_FIELDS}
+            return self._json(values) if schema == "description" else self._labels(DESCRIBE_FIELDS, values)
+        if kind == "evaluate":
+            values = self._evaluation()
+            return self._json(values) if schema == "evaluation" else self._labels(EVAL_FIELDS, values)
+        if schema == "evaluated_translation":
+            return self._json({"Translation": f"translated text {n}", **self._evaluation()})
+        return f"translated text {n}"
+
+    def _content(self, kind, schema, user_prompt, choice):
+        items = re.findall(ITEM_MARKER, user_prompt)
+        if schema == "candidate_evaluations":
+            return self._json({"Candidates": [{"Item": int(item), **self._evaluation()} for item in items]})
+        if not items:
+            return self._section(kind, schema, choice)
+        # packed request: one section per item, a malformed answer drops the whole section
+        return "\n\n".join(
+            f"[[ITEM {item}]]\n{self._section(kind, schema, item)}"
+            for item in items if not self._chance(self.malformed_rate)
+        )
+
+    def respond(self, body):
+        # (status, headers, payload) for one chat.completions request body
+        if self._chance(self.rate_limit_rate):
+            self._count("errors")
+            return 429, {"retry-after": str(self.retry_after)}, {"error": {"message": "Rate limit reached", "type": "requests"}}
+        if self._chance(self.error_rate):
+            self._count("errors")
+            return 500, {}, {"error": {"message": "The server had an error", "type": "server_error"}}
+
+        messages = body["messages"]
+        system_prompt, user_prompt = messages[0]["content"], messages[-1]["content"]
+        kind = self._kind(system_prompt)
+        schema = ((body.get("response_format") or {}).get("json_schema") or {}).get("name")
+        self._count(kind)
+
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+        time.sleep(delay)
+
+        contents = [self._content(kind, schema, user_prompt, choice) for choice in range(body.get("n") or 1)]
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        completion_tokens = sum(estimate_tokens(content) for content in contents)
+        return 200, {}, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [
+                {"index": n, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+                for n, content in enumerate(contents)
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": 0}
+            }
+        }
+
+    def _file_object(self, file_id):
+        filename, purpose, content = self.files[file_id]
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()), "filename": filename, "purpose": purpose, "status": "processed"}
+
+    def _store_file(self, filename, purpose, content):
+        with self._lock:
+            file_id = f"file-mock-{len(self.files)}"
+            self.files[file_id] = (filename, purpose, content)
+        return file_id
+
+    def upload_file(self, fields):
+        # files.create: (status, headers, payload)
+        filename, content = fields["file"]
+        purpose = fields["purpose"][1].decode("utf-8")
+        return 200, {}, self._file_object(self._store_file(filename or "upload.jsonl", purpose, content))
+
+    def file_content(self, file_id):
+        if file_id not in self.files:
+            return None
+        return self.files[file_id][2]
+
+    def create_batch(self, body):
+        # batches.create: (status, headers, payload). The batch runs on a background thread.
+        if body.get("input_file_id") not in self.files:
+            return 404, {}, {"error": {"message": "No such file", "type": "invalid_request_error"}}
+        with self._lock:
+            batch_id = f"batch-mock-{len(self.batches)}"
+            self.requests["batches"] += 1
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": body["endpoint"],
+                "input_file_id": body["input_file_id"],
+                "completion_window": body["completion_window"],
+                "status": "in_progress",
+                "output_file_id": None,
+                "error_file_id": None,
+                "created_at": int(time.time()),
+                "request_counts": {"total": 0, "completed": 0, "failed": 0}
+            }
+            batch = dict(self.batches[batch_id])
+        threading.Thread(target=self._run_batch, args=(batch_id,), daemon=True).start()
+        return 200, {}, batch
+
+    def _run_batch(self, batch_id):
+        lines = self.files[self.batches[batch_id]["input_file_id"]][2].decode("utf-8").splitlines()
+        outputs, failed = [], 0
+        for n, line in enumerate(line for line in lines if line.strip()):
+            request = json.loads(line)
+            status, _, payload = self.respond(request["body"])
+            failed += status != 200
+            outputs.append(json.dumps({
+                "id": f"batch_req_{n}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": status, "request_id": f"req_{n}", "body": payload},
+                "error": None
+            }))
+
+        output_file_id = self._store_file(f"{batch_id}_output.jsonl", "batch_output", ("\n".join(outputs) + "\n").encode("utf-8"))
+        with self._lock:
+            self.batches[batch_id].update({
+                "status": "completed",
+                "output_file_id": output_file_id,
+                "completed_at": int(time.time()),
+                "request_counts": {"total": len(outputs), "completed": len(outputs) - failed, "failed": failed}
+            })
+
+    def retrieve_batch(self, batch_id):
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return 404, {}, {"error": {"message": "No such batch", "type": "invalid_request_error"}}
+            return 200, {}, dict(batch)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # keep-alive, like the real API
+            # headers and body are separate writes; with Nagle on, delayed ACKs add ~40ms to every keep-alive request
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, headers, data, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_json(self, status, headers, payload):
+                self._send(status, headers, json.dumps(payload).encode("utf-8"))
+
+            def do_POST(self):
+                path = self.path.split("?")[0].rstrip("/")
+                raw = self.rfile.read(int(self.headers["Content-Length"]))
+                if path.endswith("/files"):
+                    self._send_json(*server.upload_file(_multipart(self.headers["Content-Type"], raw)))
+                elif path.endswith("/batches"):
+                    self._send_json(*server.create_batch(json.loads(raw)))
+                else:
+                    self._send_json(*server.respond(json.loads(raw)))
+
+            def do_GET(self):
+                path = self.path.split("?")[0].rstrip("/")
+                file_match, batch_match = re.search(FILE_CONTENT_PATH, path), re.search(BATCH_PATH, path)
+                if file_match:
+                    content = server.file_content(file_match.group(1))
+                    if content is None:
+                        self._send_json(404, {}, {"error": {"message": "No such file", "type": "invalid_request_error"}})
+                    else:
+                        self._send(200, {}, content, content_type="application/octet-stream")
+                elif batch_match:
+                    self._send_json(*server.retrieve_batch(batch_match.group(1)))
+                else:
+                    self._send_json(404, {}, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+        return Handler
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local mock of the chat completions endpoint")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--no-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockServer(port=args.port, latency=args.latency, malformed_rate=args.malformed_rate, no_rate=args.no_rate)
+    print(f"Serving on {server.base_url}")
+    with server:
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
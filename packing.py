@@ -0,0 +1,33 @@
+import re
+
+PACKED_ITEM_PATTERN = r'\[\[ITEM (\d+)\]\]\s*(.*?)\s*(?=\[\[ITEM \d+\]\]|$)'
+
+def estimate_tokens(text):
+    # Rough local estimate (~4 characters per token for English-like text), good enough for budgeting.
+    return len(text) // 4 + 1
+
+def pack(texts, indices, max_items, token_budget):
+    # Groups `indices` into packs of at most `max_items` items whose texts fit in `token_budget`
+    # estimated tokens. An item larger than the budget gets a pack of its own.
+    packs = []
+    current, current_tokens = [], 0
+    
+    for idx in indices:
+        tokens = estimate_tokens(texts[idx])
+        if current and (len(current) >= max_items or current_tokens + tokens > token_budget):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append(idx)
+        current_tokens += tokens
+    
+    if current:
+        packs.append(current)
+    return packs
+
+def format_packed(sections):
+    # sections: list of strings, numbered from 1 in order
+    return "\n\n".join(f"[[ITEM {n}]]\n{section}" for n, section in enumerate(sections, start=1))
+
+def split_packed(text):
+    # Splits a packed response back into {item number: section text}. Missing items are simply absent.
+    return {int(n): section for n, section in re.findall(PACKED_ITEM_PATTERN, text, re.DOTALL)}
@@ -0,0 +1,95 @@
+import json
+import time
+import random
+import threading
+from collections import Counter
+from packing import estimate_tokens
+from dedup import text_hash
+
+def length_class(text):
+    # Default input class: rough length bucket of the source text.
+    tokens = estimate_tokens(text)
+    if tokens < 16:
+        return "short"
+    if tokens < 64:
+        return "medium"
+    return "long"
+
+class DecisionLog:
+    # Audit trail of model cascade and adaptive evaluation decisions. Counts per decision are always kept;
+    # with a path, every decision is also appended to a JSONL file (texts are logged by hash only).
+    def __init__(self, path=None):
+        self.path = path
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self.file = open(path, 'a', encoding='utf-8') if path is not None else None
+
+    def record(self, decision, text=None, **details):
+        record = {"time": time.time(), "decision": decision, **details}
+        if text is not None:
+            record["text_hash"] = text_hash(text)
+        with self._lock:
+            self.counts[decision] += 1
+            if self.file is not None:
+                self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+class AdaptiveEvalPolicy:
+    # Decides per input whether its translation gets evaluated:
+    #   - inputs under `min_tokens` estimated tokens are skipped
+    #   - input classes (per target language) whose first-attempt pass rate is at least `pass_rate` over
+    #     `min_samples` evaluations are only spot-checked with probability `sample_rate`, so their pass
+    #     rate keeps being measured and evaluation comes back if it drops
+    #   - everything else is evaluated
+    # `classify(text)` names an input's class, length buckets by default. Pass rates can be saved and
+    # loaded, so the history carries over between runs.
+    def __init__(self, min_tokens=4, pass_rate=0.95, min_samples=30, sample_rate=0.1, classify=None, seed=0):
+        self.min_tokens = min_tokens
+        self.pass_rate = pass_rate
+        self.min_samples = min_samples
+        self.sample_rate = sample_rate
+        self.classify = classify or length_class
+        self.stats = {} # input class -> [passed, evaluated]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def input_class(self, text, dest_lang=None):
+        return f"{dest_lang}:{self.classify(text)}" if dest_lang is not None else self.classify(text)
+
+    def decide(self, text, dest_lang=None):
+        # (evaluate?, reason, input class)
+        input_class = self.input_class(text, dest_lang)
+        if estimate_tokens(text) < self.min_tokens:
+            return False, "short input", input_class
+
+        with self._lock:
+            passed, evaluated = self.stats.get(input_class, (0, 0))
+            if evaluated >= self.min_samples and passed / evaluated >= self.pass_rate:
+                if self._rng.random() < self.sample_rate:
+                    return True, f"spot check ({passed / evaluated:.0%} pass rate)", input_class
+                return False, f"high pass rate ({passed / evaluated:.0%} over {evaluated})", input_class
+        return True, "enforced", input_class
+
+    def record(self, text, passed, dest_lang=None):
+        # first evaluation of an item's translation
+        input_class = self.input_class(text, dest_lang)
+        with self._lock:
+            stats = self.stats.setdefault(input_class, [0, 0])
+            stats[0] += int(passed)
+            stats[1] += 1
+
+    def save(self, path):
+        with self._lock:
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(self.stats, file)
+
+    def load(self, path):
+        with open(path, encoding='utf-8') as file:
+            stats = json.load(file)
+        with self._lock:
+            self.stats = {input_class: list(values) for input_class, values in stats.items()}
+        return self
@@ -1,4 +1,5 @@
 # Describe prompts
+# keys: SRC_LANG
 DESCRIBE_SYSTEM_PROMPT = """\
 You are a language analysis assistant. Your task is to analyze and describe the language of a given text based on specific points. When analyzing, ensure that each section is clearly labeled for easy parsing. The analysis should include:
 
@@ -10,8 +11,12 @@ You are a language analysis assistant. Your task is to analyze and describe the
 6. Symbolism: Look for metaphors, symbols, or descriptive language that add layers of meaning or evoke imagery. Describe how these elements contribute to the overall depth of the message. Use the label `<<Symbolism>>`.
 """
 
-# keys: SRC_LANG, QUERY
-DESCRIBE_MAIN_PROMPT = """\
+# Every main prompt is split into a static PREFIX and a variable TAIL (see templates.py).
+# The prefix only uses run-level keys (SRC_LANG for describe), everything that changes per item lives in the tail,
+# so the system prompt + prefix stay byte-identical across calls and can hit the provider's prompt cache.
+
+# keys: SRC_LANG
+DESCRIBE_MAIN_PREFIX = """\
 Given a text in `{SRC_LANG}`, please analyze and describe the language used based on the following points. For each point, start with the corresponding label to make parsing easier.
 
 Example:
@@ -60,9 +65,16 @@ Example:
 <<CulturalMeaning>>: The shorthand language (e.g., “u,” “sth”) is typical of texting or online communication among friends, signaling casual and familiar interaction.
 <<Symbolism>>: No deep symbolism, but the language choice reflects a casual approach to offering advice, making it feel like friendly guidance rather than a formal recommendation.
 
+"""
+
+# keys: QUERY
+DESCRIBE_MAIN_TAIL = """\
 Query: {QUERY}
 """
 
+# keys: SRC_LANG, QUERY
+DESCRIBE_MAIN_PROMPT = DESCRIBE_MAIN_PREFIX + DESCRIBE_MAIN_TAIL
+
 # Translate
 TRANSLATE_SYSTEM_PROMPT = """\
 You are a translation assistant. Your task is to translate text from one language to another while considering the context provided in the description. When translating, keep the following guidelines in mind:
@@ -76,21 +88,43 @@ You are a translation assistant. Your task is to translate text from one languag
 Your response should include the translated text based on the context provided and nothing more. Do not include the original text in the translation. Do not include sentences like "Here’s the translation based on the provided description", as this will be handled by the system.
 """
 
+TRANSLATE_MAIN_PREFIX = """\
+Help me translate the text below from the source language to the target language. A description of the text (style, tone, nuances, intent, cultural meaning and symbolism) is given before it, use it as context for the translation.
+
+"""
+
 # keys: DESCRIPTION, SRC_LANG, DEST_LANG, QUERY
-TRANSLATE_MAIN_PROMPT = """\
-Given a description of a text:
+TRANSLATE_MAIN_TAIL = """\
+Source language: {SRC_LANG}
+Target language: {DEST_LANG}
+
+Description:
 {DESCRIPTION}
 
-Help me translate this text from {SRC_LANG} to {DEST_LANG}:
+Text:
 {QUERY}
 """
 
+# keys: DESCRIPTION, SRC_LANG, DEST_LANG, QUERY
+TRANSLATE_MAIN_PROMPT = TRANSLATE_MAIN_PREFIX + TRANSLATE_MAIN_TAIL
+
+TRANSLATE_MAIN_NO_DESC_PREFIX = """\
+Help me translate the text below from the source language to the target language.
+
+"""
+
 # keys: SRC_LANG, DEST_LANG, QUERY
-TRANSLATE_MAIN_NO_DESC_PROMPT = """\
-Help me translate this text from {SRC_LANG} to {DEST_LANG}:
+TRANSLATE_MAIN_NO_DESC_TAIL = """\
+Source language: {SRC_LANG}
+Target language: {DEST_LANG}
+
+Text:
 {QUERY}
 """
 
+# keys: SRC_LANG, DEST_LANG, QUERY
+TRANSLATE_MAIN_NO_DESC_PROMPT = TRANSLATE_MAIN_NO_DESC_PREFIX + TRANSLATE_MAIN_NO_DESC_TAIL
+
 # Evaluate
 EVALUATE_SYSTEM_PROMPT = """\
 You are a translation evaluator. Your task is to assess the quality of a translation based on specific criteria. When evaluating the translation, consider the following:
@@ -106,24 +140,287 @@ Your response should include special tokens to indicate your answers clearly:
 - <<StyleAndTone>>: "yes" or "no"
 """
 
+EVALUATE_MAIN_PREFIX = """\
+Please evaluate the quality of the translation given below.
+
+1. Does the translation accurately convey the meaning and maintain a clear sentence structure?
+2. Is the translation easy to understand for the reader?
+3. Does the translation preserve the style and tone of the original text?
+
+Answer each question with the special tokens:
+
+- <<Accuracy>>:
+- <<Clarity>>:
+- <<StyleAndTone>>:
+
+"""
+
 # keys: SRC_LANG, DEST_LANG, QUERY, TRANSLATION
-EVALUATE_MAIN_PROMPT = """\
-Given a translation from {SRC_LANG} to {DEST_LANG}:  
+EVALUATE_MAIN_TAIL = """\
+Given a translation from {SRC_LANG} to {DEST_LANG}:
 Query:
 {QUERY}
 
 Translation:
 {TRANSLATION}
+"""
+
+# keys: SRC_LANG, DEST_LANG, QUERY, TRANSLATION
+EVALUATE_MAIN_PROMPT = EVALUATE_MAIN_PREFIX + EVALUATE_MAIN_TAIL
+
+
+# Packed prompts: several inputs per request, each one marked with [[ITEM n]] (see packing.py)
+
+# keys: SRC_LANG
+DESCRIBE_PACKED_MAIN_PREFIX = DESCRIBE_MAIN_PREFIX + """\
+Below are several queries, each one starting with a [[ITEM n]] marker. Analyze every query separately.
+For each query, first repeat its [[ITEM n]] marker on its own line, then give all six labels for that query only.
+
+"""
+
+# keys: QUERIES
+DESCRIBE_PACKED_MAIN_TAIL = """\
+Queries:
+{QUERIES}
+"""
+
+TRANSLATE_PACKED_MAIN_PREFIX = """\
+Help me translate each of the texts below from the source language to the target language. Each text starts with a [[ITEM n]] marker and may come with a description of the text.
+For each text, first repeat its [[ITEM n]] marker on its own line, then give only the translation of that text.
+
+"""
+
+# keys: SRC_LANG, DEST_LANG, QUERIES
+TRANSLATE_PACKED_MAIN_TAIL = """\
+Source language: {SRC_LANG}
+Target language: {DEST_LANG}
+
+{QUERIES}
+"""
 
-Please evaluate the quality of the translation you have produced.
+EVALUATE_PACKED_MAIN_PREFIX = """\
+Please evaluate the quality of each of the translations given below separately. Each one starts with a [[ITEM n]] marker.
 
 1. Does the translation accurately convey the meaning and maintain a clear sentence structure?
 2. Is the translation easy to understand for the reader?
 3. Does the translation preserve the style and tone of the original text?
 
-Answer each question with the special tokens:
+For each translation, first repeat its [[ITEM n]] marker on its own line, then answer each question with the special tokens:
 
 - <<Accuracy>>:
 - <<Clarity>>:
 - <<StyleAndTone>>:
+
+"""
+
+# keys: SRC_LANG, DEST_LANG, QUERIES
+EVALUATE_PACKED_MAIN_TAIL = """\
+Given several translations from {SRC_LANG} to {DEST_LANG}:
+
+{QUERIES}
+"""
+
+
+# Structured output mode: JSON schemas for response_format (see Describe/TranslateEval structured=True)
+# Property names match the <<Label>> tokens, so parsed results look the same in both modes.
+
+YES_NO = {"type": "string", "enum": ["yes", "no"]}
+
+DESCRIBE_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "description",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "Style": {"type": "string"},
+                "Tone": {"type": "string"},
+                "Nuances": {"type": "string"},
+                "Intent": {"type": "string"},
+                "CulturalMeaning": {"type": "string"},
+                "Symbolism": {"type": "string"}
+            },
+            "required": ["Style", "Tone", "Nuances", "Intent", "CulturalMeaning", "Symbolism"],
+            "additionalProperties": False
+        }
+    }
+}
+
+EVALUATE_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "evaluation",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "Accuracy": YES_NO,
+                "Clarity": YES_NO,
+                "StyleAndTone": YES_NO
+            },
+            "required": ["Accuracy", "Clarity", "StyleAndTone"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Several candidate translations judged in one call (EVALUATE_CANDIDATES), `Item` is the candidate's [[ITEM n]] number
+EVALUATE_CANDIDATES_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "candidate_evaluations",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "Candidates": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "Item": {"type": "integer"},
+                            "Accuracy": YES_NO,
+                            "Clarity": YES_NO,
+                            "StyleAndTone": YES_NO
+                        },
+                        "required": ["Item", "Accuracy", "Clarity", "StyleAndTone"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["Candidates"],
+            "additionalProperties": False
+        }
+    }
+}
+
+TRANSLATE_SELF_EVAL_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "evaluated_translation",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "Translation": {"type": "string"},
+                "Accuracy": YES_NO,
+                "Clarity": YES_NO,
+                "StyleAndTone": YES_NO
+            },
+            "required": ["Translation", "Accuracy", "Clarity", "StyleAndTone"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Translation and evaluation in one response, used with TRANSLATE_SELF_EVAL_SCHEMA
+TRANSLATE_SELF_EVAL_SYSTEM_PROMPT = TRANSLATE_SYSTEM_PROMPT + """
+After translating, review your translation as a translation evaluator would and answer "yes" or "no" for each criterion:
+
+- Accuracy: Does the translation accurately convey the meaning of the original text while maintaining a clear sentence structure?
+- Clarity: Is the translation easy to understand for the intended audience?
+- StyleAndTone: Does the translation preserve the style and tone of the original text?
+
+Put only the translated text in `Translation`, and your answers in `Accuracy`, `Clarity` and `StyleAndTone`.
+"""
+
+
+# Repair: re-translation that gets the evaluator's failed criteria as feedback
+TRANSLATE_REPAIR_PREFIX = """\
+A previous translation of the text below did not pass review. Write an improved translation that fixes the failed criteria while keeping what was already right. The criteria are:
+
+- Accuracy: the translation conveys the meaning of the original text with a clear sentence structure.
+- Clarity: the translation is easy to understand for the intended audience.
+- StyleAndTone: the translation preserves the style and tone of the original text.
+
+"""
+
+# keys: SRC_LANG, DEST_LANG, DESCRIPTION (empty, or the description block), QUERY, TRANSLATION, FAILED_CRITERIA
+TRANSLATE_REPAIR_TAIL = """\
+Source language: {SRC_LANG}
+Target language: {DEST_LANG}
+
+{DESCRIPTION}Text:
+{QUERY}
+
+Previous translation:
+{TRANSLATION}
+
+Failed criteria: {FAILED_CRITERIA}
+"""
+
+# Several candidate translations of one text, judged in a single evaluator call
+EVALUATE_CANDIDATES_PREFIX = """\
+Please evaluate each of the candidate translations given below separately. They all translate the same query, and each one starts with a [[ITEM n]] marker.
+
+1. Does the translation accurately convey the meaning and maintain a clear sentence structure?
+2. Is the translation easy to understand for the reader?
+3. Does the translation preserve the style and tone of the original text?
+
+For each candidate, first repeat its [[ITEM n]] marker on its own line, then answer each question with the special tokens:
+
+- <<Accuracy>>:
+- <<Clarity>>:
+- <<StyleAndTone>>:
+
+"""
+
+# keys: SRC_LANG, DEST_LANG, QUERY, CANDIDATES
+EVALUATE_CANDIDATES_TAIL = """\
+Given candidate translations from {SRC_LANG} to {DEST_LANG} of this query:
+{QUERY}
+
+{CANDIDATES}
+"""
+
+# Document mode: one chunk of a longer document, with a little of the neighbouring chunks as context
+TRANSLATE_CHUNK_PREFIX = """\
+Help me translate one part of a longer document from the source language to the target language. Translate only the text under "Text". The text before and after it is given so the translation reads on naturally from its neighbours; use it as context only and do not translate it.
+
+"""
+
+# keys: SRC_LANG, DEST_LANG, DESCRIPTION (empty, or the description block), BEFORE, QUERY, AFTER
+TRANSLATE_CHUNK_TAIL = """\
+Source language: {SRC_LANG}
+Target language: {DEST_LANG}
+
+{DESCRIPTION}Context before:
+{BEFORE}
+
+Text:
+{QUERY}
+
+Context after:
+{AFTER}
+"""
+
+# Repair request for one chunk of a longer document, keeps the neighbouring context of TRANSLATE_CHUNK
+TRANSLATE_CHUNK_REPAIR_PREFIX = """\
+A previous translation of one part of a longer document did not pass review. Write an improved translation of the text under "Text" that fixes the failed criteria while keeping what was already right. The text before and after it is given so the translation reads on naturally from its neighbours; use it as context only and do not translate it. The criteria are:
+
+- Accuracy: the translation conveys the meaning of the original text with a clear sentence structure.
+- Clarity: the translation is easy to understand for the intended audience.
+- StyleAndTone: the translation preserves the style and tone of the original text.
+
+"""
+
+# keys: SRC_LANG, DEST_LANG, DESCRIPTION (empty, or the description block), BEFORE, QUERY, AFTER, TRANSLATION, FAILED_CRITERIA
+TRANSLATE_CHUNK_REPAIR_TAIL = """\
+Source language: {SRC_LANG}
+Target language: {DEST_LANG}
+
+{DESCRIPTION}Context before:
+{BEFORE}
+
+Text:
+{QUERY}
+
+Context after:
+{AFTER}
+
+Previous translation:
+{TRANSLATION}
+
+Failed criteria: {FAILED_CRITERIA}
 """
@@ -0,0 +1,125 @@
+import re
+import time
+import random
+import asyncio
+import threading
+
+def _parse_duration(value):
+    # "1s", "6m0s", "20ms", "1h2m3.5s" (OpenAI x-ratelimit-reset-*) or plain seconds (Retry-After)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+class _Bucket:
+    # Token bucket refilled continuously at `per_minute` / 60 units per second.
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        need = min(amount, self.capacity) # a request bigger than the bucket only waits for a full bucket
+        return 0 if self.level >= need else (need - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= amount
+
+    def clamp(self, remaining):
+        self.level = min(self.level, remaining)
+
+class RateLimiter:
+    # Client-side requests-per-minute / tokens-per-minute limiter shared by every stage in the process.
+    # Callers reserve one request and an estimated token count before each call, then reconcile with the
+    # real usage. Server rate-limit headers pull the buckets down to what the account really has left,
+    # and a 429 pauses every caller until Retry-After (or a jittered exponential backoff) has passed.
+    # rpm/tpm of None disables that bucket, the 429 backoff still applies.
+    def __init__(self, rpm=None, tpm=None, max_retries=6, base_delay=1.0, max_delay=60.0):
+        self.requests = _Bucket(rpm) if rpm else None
+        self.tokens = _Bucket(tpm) if tpm else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.paused_until = 0.0
+        self.backoffs = 0 # number of 429s / transient errors backed off from
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        # Takes one request + `tokens` if both are available now, otherwise returns how long to wait.
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+
+            buckets = [(bucket, amount) for bucket, amount in ((self.requests, 1), (self.tokens, tokens)) if bucket is not None]
+            wait = max((bucket.wait_time(amount, now) for bucket, amount in buckets), default=0)
+            if wait > 0:
+                return wait
+
+            for bucket, amount in buckets:
+                bucket.take(amount)
+            return 0
+
+    def acquire(self, tokens):
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, tokens):
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def reconcile(self, estimated_tokens, used_tokens):
+        # Gives back (or charges) the difference between the local estimate and the real usage.
+        if self.tokens is not None:
+            with self._lock:
+                self.tokens.take(used_tokens - estimated_tokens)
+
+    def update_from_headers(self, headers):
+        with self._lock:
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if self.requests is not None and remaining_requests is not None:
+                self.requests.clamp(float(remaining_requests))
+            if self.tokens is not None and remaining_tokens is not None:
+                self.tokens.clamp(float(remaining_tokens))
+
+    def backoff(self, attempt, headers=None):
+        # Delay before retry number `attempt` (0-based). Retry-After wins, then the rate-limit reset
+        # headers, then jittered exponential backoff. The pause is shared, so other callers hold off too.
+        headers = headers or {}
+        delay = _parse_duration(headers.get("retry-after-ms"))
+        delay = delay / 1000 if delay is not None else None
+        if delay is None:
+            delay = _parse_duration(headers.get("retry-after"))
+        if delay is None:
+            resets = [_parse_duration(headers.get(name)) for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")]
+            resets = [reset for reset in resets if reset is not None]
+            delay = max(resets) if resets else None
+        if delay is None:
+            delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = min(self.max_delay, delay) * random.uniform(1.0, 1.25) # jitter, so paused callers don't all resume at once
+
+        with self._lock:
+            self.backoffs += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        return delay
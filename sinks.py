@@ -0,0 +1,119 @@
+import os
+import csv
+import json
+
+def _description_text(description):
+    return json.dumps(description, ensure_ascii=False) if description is not None else ""
+
+class CsvSink:
+    # Appends one row per streamed result and flushes, so partial runs are already on disk.
+    columns = ["Index", "Original Text", "Translated Text", "Description", "Evaluation", "Tokens", "Latency (s)"]
+
+    def __init__(self, filename='results.csv'):
+        self.filename = filename
+        self.file = open(filename, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.columns)
+        self.file.flush()
+
+    def write(self, result):
+        self.writer.writerow([
+            result["index"],
+            result["text"],
+            result["translation"],
+            _description_text(result.get("description")),
+            result.get("evaluation") or "",
+            result.get("tokens", ""),
+            f"{result['latency']:.3f}" if result.get("latency") is not None else ""
+        ])
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class JsonlSink:
+    # One JSON object per streamed result (index, text, description, translation, evaluation, tokens, latency).
+    def __init__(self, filename='results.jsonl'):
+        self.filename = filename
+        self.file = open(filename, 'w', encoding='utf-8')
+
+    def write(self, result):
+        self.file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ParquetSink:
+    # Buffers up to `row_group_size` results and writes them as one Parquet row group, so memory stays
+    # bounded and finished row groups are on disk. Needs the optional pyarrow package.
+    def __init__(self, filename='results.parquet', row_group_size=1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet needs pyarrow: pip install pyarrow") from None
+
+        self.filename = filename
+        self.row_group_size = row_group_size
+        self.pa = pa
+        self.schema = pa.schema([
+            ("index", pa.int64()),
+            ("text", pa.string()),
+            ("translation", pa.string()),
+            ("description", pa.string()), # JSON
+            ("evaluation", pa.string()),
+            ("tokens", pa.int64()),
+            ("latency", pa.float64()),
+        ])
+        self.writer = pq.ParquetWriter(filename, self.schema)
+        self.rows = []
+
+    def write(self, result):
+        self.rows.append({
+            "index": result["index"],
+            "text": result["text"],
+            "translation": result["translation"],
+            "description": _description_text(result.get("description")) or None,
+            "evaluation": result.get("evaluation"),
+            "tokens": result.get("tokens"),
+            "latency": result.get("latency"),
+        })
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+SINKS = {".csv": CsvSink, ".jsonl": JsonlSink, ".parquet": ParquetSink}
+
+def open_sink(filename):
+    # Picks the sink from the file extension (.csv, .jsonl, .parquet).
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in SINKS:
+        raise ValueError(f"Unsupported output format {extension!r}, expected one of {sorted(SINKS)}")
+    return SINKS[extension](filename)
@@ -0,0 +1,61 @@
+import os
+import csv
+import json
+
+# Lazy readers for large input files. Each one yields lists of at most `batch_size` texts, so only
+# one batch is in memory at a time whatever the file size. Parquet needs the optional pyarrow package.
+
+def _batched(values, batch_size):
+    batch = []
+    for value in values:
+        batch.append("" if value is None else str(value))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def read_text_batches(path, batch_size=1000):
+    # one text per line
+    with open(path, encoding='utf-8') as file:
+        yield from _batched((line.rstrip("\n") for line in file), batch_size)
+
+def read_csv_batches(path, column="text", batch_size=1000):
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        if column not in (reader.fieldnames or []):
+            raise ValueError(f"{path} has no column {column!r} (columns: {reader.fieldnames})")
+        yield from _batched((row[column] for row in reader), batch_size)
+
+def read_jsonl_batches(path, column="text", batch_size=1000):
+    with open(path, encoding='utf-8') as file:
+        yield from _batched((json.loads(line).get(column) for line in file if line.strip()), batch_size)
+
+def read_parquet_batches(path, column="text", batch_size=1000):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet needs pyarrow: pip install pyarrow") from None
+
+    parquet_file = pq.ParquetFile(path)
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size, columns=[column]):
+        yield ["" if value is None else str(value) for value in record_batch.column(0).to_pylist()]
+
+READERS = {
+    ".txt": lambda path, column, batch_size: read_text_batches(path, batch_size),
+    ".csv": read_csv_batches,
+    ".jsonl": read_jsonl_batches,
+    ".parquet": read_parquet_batches,
+}
+
+def read_batches(path, column="text", batch_size=1000):
+    # Picks the reader from the file extension (.txt, .csv, .jsonl, .parquet).
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Unsupported input format {extension!r}, expected one of {sorted(READERS)}")
+    return READERS[extension](path, column, batch_size)
+
+def read_texts(path, column="text", batch_size=1000):
+    # Flat, lazy iterator over the texts of `path`, ready for Artinya.stream / astream.
+    for batch in read_batches(path, column, batch_size):
+        yield from batch
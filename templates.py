@@ -0,0 +1,96 @@
+from string import Formatter
+from packing import estimate_tokens
+import prompts
+
+# OpenAI caches prompt prefixes of at least 1024 tokens; cached input tokens are billed at a discount.
+CACHE_MIN_PREFIX_TOKENS = 1024
+
+# USD per 1M input tokens: (uncached, cached)
+INPUT_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075),
+    "gpt-4o": (2.50, 1.25),
+}
+
+def _keys(text):
+    return {name for _, name, _, _ in Formatter().parse(text) if name}
+
+class PromptTemplate:
+    # A system prompt plus a user prompt split into a static prefix and a variable tail.
+    # system/prefix may only use `run_keys` (values that are fixed for a whole run, e.g. SRC_LANG),
+    # so for a given run the system prompt + prefix are byte-identical on every call.
+    def __init__(self, name, system, prefix, tail, run_keys=()):
+        static_keys = _keys(system) | _keys(prefix)
+        if not static_keys <= set(run_keys):
+            raise ValueError(f"{name}: per-item keys {sorted(static_keys - set(run_keys))} must be in the tail, not the static prefix")
+
+        self.name = name
+        self.system = system
+        self.prefix = prefix
+        self.tail = tail
+        self.run_keys = tuple(run_keys)
+
+    def _run_values(self, values):
+        return {key: values[key] for key in self.run_keys if key in values}
+
+    def system_prompt(self, **values):
+        return self.system.format(**self._run_values(values))
+
+    def query_prompt(self, **values):
+        return self.prefix.format(**self._run_values(values)) + self.tail.format(**values)
+
+    def static_prefix(self, **values):
+        return self.system_prompt(**values) + self.prefix.format(**self._run_values(values))
+
+    def prefix_tokens(self, **values):
+        return estimate_tokens(self.static_prefix(**values))
+
+    def cacheable(self, **values):
+        return self.prefix_tokens(**values) >= CACHE_MIN_PREFIX_TOKENS
+
+DESCRIBE_TEMPLATE = PromptTemplate("describe", prompts.DESCRIBE_SYSTEM_PROMPT, prompts.DESCRIBE_MAIN_PREFIX, prompts.DESCRIBE_MAIN_TAIL, run_keys=("SRC_LANG",))
+DESCRIBE_PACKED_TEMPLATE = PromptTemplate("describe_packed", prompts.DESCRIBE_SYSTEM_PROMPT, prompts.DESCRIBE_PACKED_MAIN_PREFIX, prompts.DESCRIBE_PACKED_MAIN_TAIL, run_keys=("SRC_LANG",))
+TRANSLATE_TEMPLATE = PromptTemplate("translate", prompts.TRANSLATE_SYSTEM_PROMPT, prompts.TRANSLATE_MAIN_PREFIX, prompts.TRANSLATE_MAIN_TAIL)
+TRANSLATE_NO_DESC_TEMPLATE = PromptTemplate("translate_no_desc", prompts.TRANSLATE_SYSTEM_PROMPT, prompts.TRANSLATE_MAIN_NO_DESC_PREFIX, prompts.TRANSLATE_MAIN_NO_DESC_TAIL)
+TRANSLATE_PACKED_TEMPLATE = PromptTemplate("translate_packed", prompts.TRANSLATE_SYSTEM_PROMPT, prompts.TRANSLATE_PACKED_MAIN_PREFIX, prompts.TRANSLATE_PACKED_MAIN_TAIL)
+EVALUATE_TEMPLATE = PromptTemplate("evaluate", prompts.EVALUATE_SYSTEM_PROMPT, prompts.EVALUATE_MAIN_PREFIX, prompts.EVALUATE_MAIN_TAIL)
+EVALUATE_PACKED_TEMPLATE = PromptTemplate("evaluate_packed", prompts.EVALUATE_SYSTEM_PROMPT, prompts.EVALUATE_PACKED_MAIN_PREFIX, prompts.EVALUATE_PACKED_MAIN_TAIL)
+TRANSLATE_REPAIR_TEMPLATE = PromptTemplate("translate_repair", prompts.TRANSLATE_SYSTEM_PROMPT, prompts.TRANSLATE_REPAIR_PREFIX, prompts.TRANSLATE_REPAIR_TAIL)
+EVALUATE_CANDIDATES_TEMPLATE = PromptTemplate("evaluate_candidates", prompts.EVALUATE_SYSTEM_PROMPT, prompts.EVALUATE_CANDIDATES_PREFIX, prompts.EVALUATE_CANDIDATES_TAIL)
+TRANSLATE_CHUNK_TEMPLATE = PromptTemplate("translate_chunk", prompts.TRANSLATE_SYSTEM_PROMPT, prompts.TRANSLATE_CHUNK_PREFIX, prompts.TRANSLATE_CHUNK_TAIL)
+TRANSLATE_CHUNK_REPAIR_TEMPLATE = PromptTemplate("translate_chunk_repair", prompts.TRANSLATE_SYSTEM_PROMPT, prompts.TRANSLATE_CHUNK_REPAIR_PREFIX, prompts.TRANSLATE_CHUNK_REPAIR_TAIL)
+
+TEMPLATES = [
+    DESCRIBE_TEMPLATE,
+    DESCRIBE_PACKED_TEMPLATE,
+    TRANSLATE_TEMPLATE,
+    TRANSLATE_NO_DESC_TEMPLATE,
+    TRANSLATE_PACKED_TEMPLATE,
+    TRANSLATE_REPAIR_TEMPLATE,
+    EVALUATE_TEMPLATE,
+    EVALUATE_PACKED_TEMPLATE,
+    EVALUATE_CANDIDATES_TEMPLATE,
+    TRANSLATE_CHUNK_TEMPLATE,
+    TRANSLATE_CHUNK_REPAIR_TEMPLATE,
+]
+
+def prefix_report(src_lang="English"):
+    # Estimated static prefix size per template and whether it reaches the provider's caching threshold.
+    # Templates below the threshold still keep variable content at the tail, padding them up would cost
+    # more in uncached tokens than the cache discount gives back.
+    return [
+        {"template": template.name, "prefix_tokens": template.prefix_tokens(SRC_LANG=src_lang), "cacheable": template.cacheable(SRC_LANG=src_lang)}
+        for template in TEMPLATES
+    ]
+
+def input_prices(model):
+    # (uncached, cached) price of a model; dated snapshots (e.g. "gpt-4o-2024-08-06") use their base model's
+    matches = [name for name in INPUT_PRICES if model == name or model.startswith(name + "-")]
+    return INPUT_PRICES[max(matches, key=len)] if matches else INPUT_PRICES["gpt-4o-mini"]
+
+def cache_report(prompt_tokens, cached_tokens, model="gpt-4o-mini"):
+    # Prompt cache hit ratio and the estimated USD saved by cached input tokens.
+    uncached_price, cached_price = input_prices(model)
+    return {
+        "hit_ratio": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+        "estimated_savings": cached_tokens * (uncached_price - cached_price) / 1_000_000
+    }